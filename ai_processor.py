@@ -1,11 +1,38 @@
 import os
 import json
-from openai import OpenAI
+import logging
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
 
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 
+REFERENCE_RESPONSE_CHARS = 800
+
 # the newest OpenAI model is "gpt-5" which was released August 7, 2025.
 # do not change this unless explicitly requested by the user
+AI_MODEL = os.environ.get("AI_MODEL", "gpt-5")
+
+# Model routing: try the fast model first and escalate to AI_MODEL only when
+# its answer is low-confidence, flagged for escalation, or not valid JSON.
+AI_FAST_MODEL = os.environ.get("AI_FAST_MODEL", "gpt-5-mini")
+AI_ROUTING_ENABLED = os.environ.get("AI_ROUTING_ENABLED", "true").lower() in ("1", "true", "yes")
+PROMPT_CACHE_KEY = "support-desk-analysis"
+
+# USD per 1M tokens: (input, cached input, output). Override with AI_MODEL_PRICES as JSON.
+MODEL_PRICES = {
+    "gpt-5": (1.25, 0.125, 10.0),
+    "gpt-5-mini": (0.25, 0.025, 2.0),
+}
+MODEL_PRICES.update({
+    model: tuple(prices) for model, prices in json.loads(os.environ.get("AI_MODEL_PRICES", "{}")).items()
+})
+
+REQUIRED_FIELDS = ["category", "urgency", "summary", "fix_steps", "response", "confidence", "escalation_required", "approval_status"]
+CATEGORIES = {"Billing", "Technical", "Login / Access", "Feature Request", "General Inquiry", "Other"}
+LEVELS = {"Low", "Medium", "High"}
 
 MASTER_PROMPT = """# AI SUPPORT DESK AUTO-RESPONDER
 
@@ -112,8 +139,141 @@ You must NEVER:
 """
 
 
-def analyze_email(ticket_id: str, sender_email: str, subject: str, body: str, received_at: str) -> dict:
-    """Analyze an email using OpenAI and return structured response."""
+_stats_lock = threading.Lock()
+_routing_stats = {}
+
+
+def _record_call(tier: str, model: str, latency_ms: float, usage=None, failed: bool = False, escalated: bool = False):
+    with _stats_lock:
+        stats = _routing_stats.setdefault(tier, {
+            "model": model,
+            "calls": 0,
+            "failures": 0,
+            "escalations": 0,
+            "latency_ms_total": 0.0,
+            "prompt_tokens": 0,
+            "cached_tokens": 0,
+            "completion_tokens": 0,
+            "cost_usd": 0.0,
+        })
+        stats["model"] = model
+        stats["calls"] += 1
+        stats["failures"] += int(failed)
+        stats["escalations"] += int(escalated)
+        stats["latency_ms_total"] += latency_ms
+        if usage is not None:
+            prompt_tokens = usage.prompt_tokens or 0
+            details = getattr(usage, "prompt_tokens_details", None)
+            cached_tokens = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+            completion_tokens = usage.completion_tokens or 0
+            stats["prompt_tokens"] += prompt_tokens
+            stats["cached_tokens"] += cached_tokens
+            stats["completion_tokens"] += completion_tokens
+            input_price, cached_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0, 0.0))
+            stats["cost_usd"] += (
+                (prompt_tokens - cached_tokens) * input_price
+                + cached_tokens * cached_price
+                + completion_tokens * output_price
+            ) / 1_000_000
+
+
+def get_routing_stats() -> dict:
+    """Per-tier call, latency, token and cost counters since process start."""
+    with _stats_lock:
+        snapshot = {tier: dict(stats) for tier, stats in _routing_stats.items()}
+    for stats in snapshot.values():
+        stats["avg_latency_ms"] = round(stats["latency_ms_total"] / stats["calls"], 1) if stats["calls"] else 0.0
+        stats["latency_ms_total"] = round(stats["latency_ms_total"], 1)
+        stats["cost_usd"] = round(stats["cost_usd"], 6)
+    return snapshot
+
+
+def validate_result(result) -> Optional[str]:
+    """Return why an AI result is unusable, or None when it is valid."""
+    if not isinstance(result, dict):
+        return "response is not a JSON object"
+    missing = [field for field in REQUIRED_FIELDS if field not in result]
+    if missing:
+        return f"missing fields: {', '.join(missing)}"
+    if result["category"] not in CATEGORIES:
+        return f"unknown category: {result['category']}"
+    if result["urgency"] not in LEVELS or result["confidence"] not in LEVELS:
+        return "invalid urgency or confidence"
+    if not isinstance(result["response"], str) or not result["response"].strip():
+        return "empty response"
+    return None
+
+
+def escalation_reason(result: dict) -> Optional[str]:
+    """Why a fast-tier result should be redone by the large model, if at all."""
+    problem = validate_result(result)
+    if problem:
+        return problem
+    if result.get("confidence") == "Low":
+        return "low confidence"
+    if result.get("escalation_required"):
+        return "escalation required"
+    return None
+
+
+_client = None
+
+
+def get_client():
+    """Shared OpenAI client; the SDK is imported on first use to keep worker boot fast."""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(api_key=OPENAI_API_KEY)
+    return _client
+
+
+def _call_model(client, tier: str, model: str, user_message: str, escalated: bool = False) -> dict:
+    """Run one chat completion and parse its JSON body, recording tier counters."""
+    started = time.perf_counter()
+    try:
+        # The system prompt is identical for every call and comes first so the
+        # provider can serve it from its prompt cache.
+        response = client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": MASTER_PROMPT},
+                {"role": "user", "content": user_message}
+            ],
+            response_format={"type": "json_object"},
+            max_completion_tokens=2048,
+            prompt_cache_key=PROMPT_CACHE_KEY,
+        )
+    except Exception:
+        _record_call(tier, model, (time.perf_counter() - started) * 1000, failed=True, escalated=escalated)
+        raise
+    
+    latency_ms = (time.perf_counter() - started) * 1000
+    try:
+        result = json.loads(response.choices[0].message.content)
+    except (json.JSONDecodeError, TypeError):
+        _record_call(tier, model, latency_ms, response.usage, failed=True, escalated=escalated)
+        raise
+    _record_call(tier, model, latency_ms, response.usage, escalated=escalated)
+    return result
+
+
+def analyze_email(
+    ticket_id: str,
+    sender_email: str,
+    subject: str,
+    body: str,
+    received_at: str,
+    thread_context: Optional[str] = None,
+    similar_resolutions: Optional[list] = None
+) -> dict:
+    """Analyze an email using OpenAI and return structured response.
+
+    For follow-ups on an existing ticket, `thread_context` carries a compact
+    summary of the conversation so only the new message is sent in full.
+    `similar_resolutions` are approved replies to similar past tickets, given
+    to the model as reference material.
+    """
     
     if not OPENAI_API_KEY:
         return {
@@ -128,35 +288,63 @@ def analyze_email(ticket_id: str, sender_email: str, subject: str, body: str, re
             "approval_status": "PENDING"
         }
     
-    client = OpenAI(api_key=OPENAI_API_KEY)
+    client = get_client()
     
+    reference_section = ""
+    if similar_resolutions:
+        references = "\n\n".join(
+            f"--- Reference {n} ---\nISSUE: {item.get('summary') or item.get('email_subject')}\n"
+            f"APPROVED RESPONSE:\n{(item.get('approved_response') or '')[:REFERENCE_RESPONSE_CHARS]}"
+            for n, item in enumerate(similar_resolutions, start=1)
+        )
+        reference_section = f"""
+
+SIMILAR RESOLVED TICKETS (human-approved responses; reuse what applies, do not copy details that do not match):
+{references}"""
+
+    context_section = ""
+    if thread_context:
+        context_section = f"""This is a follow-up on an existing ticket. Summarize the whole conversation and draft a reply to the new message.
+
+CONVERSATION SO FAR:
+{thread_context}
+
+NEW MESSAGE:
+"""
+
+    # Stable text first, per-ticket details last, to keep the shared prompt prefix long.
     user_message = f"""Please analyze this support email and provide a structured response.
 
-TICKET ID: {ticket_id}
+{context_section}TICKET ID: {ticket_id}
 SENDER EMAIL: {sender_email}
 TIMESTAMP: {received_at}
 SUBJECT: {subject}
 
 EMAIL BODY:
-{body}
+{body}{reference_section}
 
 Analyze this email and respond with the required JSON format."""
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-5",
-            messages=[
-                {"role": "system", "content": MASTER_PROMPT},
-                {"role": "user", "content": user_message}
-            ],
-            response_format={"type": "json_object"},
-            max_completion_tokens=2048,
-        )
+        escalated = False
+        if AI_ROUTING_ENABLED and AI_FAST_MODEL and AI_FAST_MODEL != AI_MODEL:
+            try:
+                result = _call_model(client, "fast", AI_FAST_MODEL, user_message)
+                reason = escalation_reason(result)
+            except json.JSONDecodeError:
+                reason = "invalid JSON"
+            except Exception as e:
+                reason = f"fast model error: {str(e)}"
+            
+            if reason is None:
+                result["model"] = AI_FAST_MODEL
+                return result
+            logger.info(f"Escalating {ticket_id} to {AI_MODEL}: {reason}")
+            escalated = True
         
-        result = json.loads(response.choices[0].message.content)
+        result = _call_model(client, "full", AI_MODEL, user_message, escalated=escalated)
         
-        required_fields = ["category", "urgency", "summary", "fix_steps", "response", "confidence", "escalation_required", "approval_status"]
-        for field in required_fields:
+        for field in REQUIRED_FIELDS:
             if field not in result:
                 if field == "escalation_required":
                     result[field] = False
@@ -165,6 +353,7 @@ Analyze this email and respond with the required JSON format."""
                 else:
                     result[field] = "Unknown"
         
+        result["model"] = AI_MODEL
         return result
         
     except json.JSONDecodeError as e:
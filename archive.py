@@ -0,0 +1,128 @@
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+import zstandard
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from models import Ticket, TicketStatus, ArchivedTicket, TicketMessage, TicketAttachment
+import attachment_store
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_RETENTION_DAYS = int(os.environ.get("ARCHIVE_RETENTION_DAYS", "0"))
+ARCHIVE_BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", "500"))
+ZSTD_LEVEL = 9
+
+ARCHIVABLE_STATUSES = (TicketStatus.SENT.value, TicketStatus.REJECTED.value)
+TEXT_FIELDS = ("email_body", "summary", "fix_steps", "ai_response", "approved_response", "rejected_reason")
+SCALAR_FIELDS = (
+    "id", "ticket_id", "sender_email", "sender_name", "email_subject", "received_at",
+    "status", "category", "urgency", "confidence", "escalation_required",
+    "approved_by", "approved_at", "sent_at", "created_at", "updated_at",
+)
+
+_compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+_decompressor = zstandard.ZstdDecompressor()
+
+
+def compress_fields(ticket: Ticket) -> bytes:
+    data = {field: getattr(ticket, field) for field in TEXT_FIELDS}
+    return _compressor.compress(json.dumps(data).encode("utf-8"))
+
+
+def decompress_fields(payload: bytes) -> dict:
+    return json.loads(_decompressor.decompress(payload))
+
+
+def restore_ticket(archived: ArchivedTicket) -> Ticket:
+    """Rebuild a read-only, session-less Ticket from its archived row."""
+    ticket = Ticket(**{field: getattr(archived, field) for field in SCALAR_FIELDS})
+    for field, value in decompress_fields(archived.payload).items():
+        setattr(ticket, field, value)
+    ticket.archived = True
+    return ticket
+
+
+def find_ticket(db: Session, ticket_id: str) -> Optional[Ticket]:
+    """Look a ticket up in the live table, falling back to the archive."""
+    ticket = db.query(Ticket).filter(Ticket.ticket_id == ticket_id).first()
+    if ticket:
+        return ticket
+
+    archived = db.query(ArchivedTicket).filter(ArchivedTicket.ticket_id == ticket_id).first()
+    if archived:
+        return restore_ticket(archived)
+    return None
+
+
+def archive_tickets(db: Session, older_than_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Move sent/rejected tickets older than the cutoff into the archive, one batch per transaction."""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    last_activity = func.coalesce(Ticket.sent_at, Ticket.updated_at, Ticket.created_at)
+    archived_count = 0
+
+    while True:
+        tickets = db.query(Ticket).filter(
+            Ticket.status.in_(ARCHIVABLE_STATUSES),
+            last_activity < cutoff
+        ).order_by(Ticket.id).limit(batch_size).all()
+        if not tickets:
+            break
+
+        rows = []
+        for ticket in tickets:
+            row = {field: getattr(ticket, field) for field in SCALAR_FIELDS}
+            row["payload"] = compress_fields(ticket)
+            rows.append(row)
+
+        db.execute(insert(ArchivedTicket), rows)
+        db.query(Ticket).filter(
+            Ticket.id.in_([ticket.id for ticket in tickets])
+        ).delete(synchronize_session=False)
+        db.commit()
+        db.expunge_all()
+        archived_count += len(rows)
+
+    return archived_count
+
+
+def purge_archive(db: Session, retention_days: int = ARCHIVE_RETENTION_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Delete archived tickets past retention, with their messages, attachment records and blobs."""
+    if retention_days <= 0:
+        return 0
+
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    purged_count = 0
+
+    while True:
+        ticket_ids = [
+            ticket_id for (ticket_id,) in db.query(ArchivedTicket.ticket_id).filter(
+                ArchivedTicket.archived_at < cutoff
+            ).order_by(ArchivedTicket.id).limit(batch_size)
+        ]
+        if not ticket_ids:
+            break
+
+        blobs = {
+            sha256 for (sha256,) in db.query(TicketAttachment.sha256).filter(TicketAttachment.ticket_id.in_(ticket_ids))
+        }
+        db.query(TicketMessage).filter(TicketMessage.ticket_id.in_(ticket_ids)).delete(synchronize_session=False)
+        db.query(TicketAttachment).filter(TicketAttachment.ticket_id.in_(ticket_ids)).delete(synchronize_session=False)
+        db.query(ArchivedTicket).filter(ArchivedTicket.ticket_id.in_(ticket_ids)).delete(synchronize_session=False)
+        db.commit()
+        purged_count += len(ticket_ids)
+
+        # Blobs are shared by content, so only remove those no other ticket still references.
+        if blobs:
+            still_used = {
+                sha256 for (sha256,) in db.query(TicketAttachment.sha256).filter(TicketAttachment.sha256.in_(blobs))
+            }
+            for sha256 in blobs - still_used:
+                attachment_store.delete_blob(sha256)
+
+    return purged_count
@@ -0,0 +1,39 @@
+import hashlib
+import os
+import tempfile
+
+ATTACHMENT_STORAGE_DIR = os.environ.get("ATTACHMENT_STORAGE_DIR", "attachments")
+
+
+def blob_path(sha256: str) -> str:
+    """Location of a blob in the content-addressed store."""
+    return os.path.join(ATTACHMENT_STORAGE_DIR, sha256[:2], sha256[2:4], sha256)
+
+
+def store_blob(data: bytes) -> dict:
+    """Write data to the store once per SHA-256 and return its digest and size."""
+    sha256 = hashlib.sha256(data).hexdigest()
+    path = blob_path(sha256)
+
+    if not os.path.exists(path):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    return {"sha256": sha256, "size": len(data)}
+
+
+def delete_blob(sha256: str):
+    """Remove a blob from the store; callers check that nothing references it."""
+    try:
+        os.remove(blob_path(sha256))
+    except FileNotFoundError:
+        pass
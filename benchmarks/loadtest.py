@@ -0,0 +1,199 @@
+"""Load-test profile for the web UI and JSON API.
+
+Seed a large local database, start the app against it, then drive the
+read endpoints at a fixed concurrency:
+
+    python -m benchmarks.loadtest seed --rows 1000000 --database-url sqlite:///loadtest.db
+    DATABASE_URL=sqlite:///loadtest.db python main.py
+    python -m benchmarks.loadtest run --rows 1000000 --concurrency 16 --duration 30
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+ENDPOINTS = {
+    "dashboard": lambda ticket_id: "/",
+    "view_ticket": lambda ticket_id: f"/ticket/{ticket_id}",
+    "get_tickets": lambda ticket_id: "/api/tickets",
+    "get_ticket": lambda ticket_id: f"/api/ticket/{ticket_id}",
+}
+
+STATUSES = ["pending_approval", "approved", "sent", "rejected"]
+CATEGORIES = ["Billing", "Technical", "Login / Access", "Feature Request", "General Inquiry", "Other"]
+URGENCIES = ["Low", "Medium", "High"]
+
+
+def seeded_ticket_id(n: int) -> str:
+    """Deterministic ticket ID for the n-th seeded row."""
+    return f"TKT-LOAD-{n:08d}"
+
+
+def seed(database_url: str, rows: int, batch_size: int):
+    """Bulk insert synthetic tickets into the given database."""
+    os.environ["DATABASE_URL"] = database_url
+
+    from sqlalchemy import insert
+    from database import engine, Base
+    from models import Ticket
+
+    Base.metadata.create_all(bind=engine)
+
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    started = time.perf_counter()
+
+    with engine.begin() as conn:
+        for offset in range(0, rows, batch_size):
+            batch = []
+            for n in range(offset, min(offset + batch_size, rows)):
+                received_at = now - timedelta(minutes=rows - n)
+                status = rng.choice(STATUSES)
+                batch.append({
+                    "ticket_id": seeded_ticket_id(n),
+                    "sender_email": f"customer{n % 5000}@example.com",
+                    "sender_name": f"Customer {n % 5000}",
+                    "email_subject": f"Load test ticket {n}",
+                    "email_body": "Good day,\n\nThis is a synthetic ticket used for load testing.\n" * 4,
+                    "received_at": received_at,
+                    "status": status,
+                    "category": rng.choice(CATEGORIES),
+                    "urgency": rng.choice(URGENCIES),
+                    "summary": "Synthetic load-test ticket.",
+                    "fix_steps": "1. Step one\n2. Step two\n3. Step three",
+                    "ai_response": "Good day,\n\nThank you for contacting us.\n\nInfinityWork Support Team",
+                    "confidence": "Medium",
+                    "escalation_required": False,
+                    "approved_response": "Good day,\n\nResolved.\n\nInfinityWork Support Team" if status in ("approved", "sent") else None,
+                    "created_at": received_at,
+                })
+            conn.execute(insert(Ticket), batch)
+            print(f"Seeded {offset + len(batch)}/{rows} tickets", end="\r", flush=True)
+
+    elapsed = time.perf_counter() - started
+    print(f"\nSeeded {rows} tickets in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)")
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def _worker(base_url: str, endpoints: list, rows: int, deadline: float, samples: dict, lock: threading.Lock):
+    parts = urlsplit(base_url)
+    conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    conn = conn_cls(parts.hostname, parts.port, timeout=60)
+    rng = random.Random()
+    local = {name: {"latencies": [], "errors": 0} for name in endpoints}
+
+    while time.perf_counter() < deadline:
+        name = rng.choice(endpoints)
+        path = ENDPOINTS[name](seeded_ticket_id(rng.randrange(rows)))
+        started = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status < 400
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = conn_cls(parts.hostname, parts.port, timeout=60)
+            ok = False
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if ok:
+            local[name]["latencies"].append(elapsed_ms)
+        else:
+            local[name]["errors"] += 1
+
+    conn.close()
+    with lock:
+        for name, data in local.items():
+            samples[name]["latencies"].extend(data["latencies"])
+            samples[name]["errors"] += data["errors"]
+
+
+def run(base_url: str, endpoints: list, rows: int, concurrency: int, duration: float) -> dict:
+    """Hit the endpoints from `concurrency` threads for `duration` seconds."""
+    samples = {name: {"latencies": [], "errors": 0} for name in endpoints}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    threads = [
+        threading.Thread(target=_worker, args=(base_url, endpoints, rows, deadline, samples, lock))
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    report = {"concurrency": concurrency, "duration_s": round(elapsed, 2), "endpoints": {}}
+    for name, data in samples.items():
+        latencies = sorted(data["latencies"])
+        report["endpoints"][name] = {
+            "requests": len(latencies),
+            "errors": data["errors"],
+            "throughput_rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        }
+    return report
+
+
+def print_report(report: dict):
+    print(f"\nconcurrency={report['concurrency']} duration={report['duration_s']}s")
+    print(f"{'endpoint':<14}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, row in report["endpoints"].items():
+        print(
+            f"{name:<14}{row['requests']:>10}{row['errors']:>8}{row['throughput_rps']:>10}"
+            f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Support desk load-test profile")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = subparsers.add_parser("seed", help="Seed a database with synthetic tickets")
+    seed_parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL", "sqlite:///loadtest.db"))
+    seed_parser.add_argument("--rows", type=int, default=1_000_000)
+    seed_parser.add_argument("--batch-size", type=int, default=10_000)
+
+    run_parser = subparsers.add_parser("run", help="Drive the read endpoints of a running server")
+    run_parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    run_parser.add_argument("--rows", type=int, default=1_000_000, help="Row count used when seeding")
+    run_parser.add_argument("--concurrency", type=int, default=8)
+    run_parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    run_parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="Comma-separated subset of: " + ", ".join(ENDPOINTS))
+    run_parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    args = parser.parse_args()
+
+    if args.command == "seed":
+        seed(args.database_url, args.rows, args.batch_size)
+    else:
+        endpoints = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+        unknown = [name for name in endpoints if name not in ENDPOINTS]
+        if unknown:
+            parser.error(f"Unknown endpoints: {', '.join(unknown)}")
+        report = run(args.base_url, endpoints, args.rows, args.concurrency, args.duration)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Memory benchmark for MIME parsing of large, attachment-heavy messages.
+
+Compares peak allocations of the previous whole-message parse
+(`email.message_from_bytes` over the full RFC822 payload) with the
+streaming parser used by the ingestor:
+
+    python -m benchmarks.mime_memory --sizes 5,20,50 --count 3
+"""
+import argparse
+import email
+import os
+import tempfile
+import time
+import tracemalloc
+from email.message import EmailMessage
+
+from email_ingestor import FETCH_CHUNK_BYTES, StreamingMessageParser, get_email_body, get_attachment_metadata
+
+
+def build_message(attachment_mb: int) -> bytes:
+    msg = EmailMessage()
+    msg["From"] = "Customer <customer@example.com>"
+    msg["To"] = "support@example.com"
+    msg["Subject"] = f"Logs attached ({attachment_mb} MB)"
+    msg.set_content("Good day,\n\nThe export keeps failing, logs and screenshots attached.\n")
+    msg.add_alternative("<html><body><p>Good day,</p><p>The export keeps failing.</p></body></html>", subtype="html")
+    msg.add_attachment(os.urandom(attachment_mb * 1024 * 1024 // 2), maintype="application",
+                       subtype="octet-stream", filename="server.log")
+    msg.add_attachment(os.urandom(attachment_mb * 1024 * 1024 // 2), maintype="image",
+                       subtype="png", filename="screenshot.png")
+    return msg.as_bytes()
+
+
+def parse_whole(path: str):
+    with open(path, "rb") as f:
+        data = f.read()
+    msg = email.message_from_bytes(data)
+    return get_email_body(msg)
+
+
+def parse_streaming(path: str):
+    parser = StreamingMessageParser(max_bytes=os.path.getsize(path))
+    with open(path, "rb") as f:
+        while chunk := f.read(FETCH_CHUNK_BYTES):
+            parser.feed(chunk)
+    msg = parser.close()
+    get_attachment_metadata(msg)
+    return get_email_body(msg)
+
+
+def measure(func, path: str) -> tuple:
+    tracemalloc.start()
+    started = time.perf_counter()
+    func(path)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MIME parsing memory benchmark")
+    parser.add_argument("--sizes", default="5,20,50", help="Comma-separated attachment sizes in MB")
+    parser.add_argument("--count", type=int, default=2, help="Messages per size")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        corpus = []
+        for size in sizes:
+            for n in range(args.count):
+                path = os.path.join(corpus_dir, f"message-{size}mb-{n}.eml")
+                with open(path, "wb") as f:
+                    f.write(build_message(size))
+                corpus.append((size, path))
+
+        print(f"{'message':<22}{'size MB':>9}{'whole peak MB':>15}{'stream peak MB':>16}{'whole s':>9}{'stream s':>10}")
+        for size, path in corpus:
+            whole_peak, whole_time = measure(parse_whole, path)
+            stream_peak, stream_time = measure(parse_streaming, path)
+            print(
+                f"{os.path.basename(path):<22}{os.path.getsize(path) / (1024 * 1024):>9.1f}"
+                f"{whole_peak:>15.1f}{stream_peak:>16.1f}{whole_time:>9.2f}{stream_time:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
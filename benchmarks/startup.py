@@ -0,0 +1,143 @@
+"""Cold-start benchmark for a web worker.
+
+Measures two things for `main`, each in a fresh interpreter:
+
+- import time, from `python -X importtime -c "import main"`, with the slowest
+  packages by self time;
+- time to first request: wall time from launching uvicorn until the first
+  successful response.
+
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --database-url postgresql://... --json
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _env(database_url: str) -> dict:
+    env = dict(os.environ)
+    env["DATABASE_URL"] = database_url
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def parse_importtime(stderr: str) -> tuple:
+    """Return (total_us for `main`, {top-level package: self_us}) from -X importtime output."""
+    total_us = 0
+    by_package = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        by_package[name.split(".")[0]] += int(self_us)
+        if name == "main":
+            total_us = int(cumulative_us)
+    return total_us, dict(by_package)
+
+
+def measure_import(database_url: str) -> tuple:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, env=_env(database_url), capture_output=True, text=True, check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_request(database_url: str, path: str, timeout: float) -> float:
+    """Seconds from spawning a uvicorn worker until `path` answers with a non-5xx status."""
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=_env(database_url), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with code {server.returncode}")
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                conn.request("GET", path)
+                status = conn.getresponse().status
+                conn.close()
+                if status < 500:
+                    return time.perf_counter() - started
+            except OSError:
+                pass
+            time.sleep(0.005)
+        raise RuntimeError(f"No response from {path} within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run(database_url: str, runs: int, path: str, top: int, timeout: float) -> dict:
+    subprocess.run([sys.executable, "cli.py", "migrate"], cwd=ROOT, env=_env(database_url),
+                   check=True, stdout=subprocess.DEVNULL)
+
+    import_totals = []
+    packages = defaultdict(list)
+    first_request = []
+    for _ in range(runs):
+        total_us, by_package = measure_import(database_url)
+        import_totals.append(total_us / 1000)
+        for name, self_us in by_package.items():
+            packages[name].append(self_us / 1000)
+        first_request.append(measure_first_request(database_url, path, timeout) * 1000)
+
+    slowest = sorted(((name, statistics.median(ms)) for name, ms in packages.items()), key=lambda item: -item[1])
+    return {
+        "runs": runs,
+        "path": path,
+        "import_main_ms": {"median": round(statistics.median(import_totals), 1), "min": round(min(import_totals), 1)},
+        "first_request_ms": {"median": round(statistics.median(first_request), 1), "min": round(min(first_request), 1)},
+        "slowest_packages_ms": {name: round(ms, 1) for name, ms in slowest[:top]},
+    }
+
+
+def print_report(report: dict):
+    print(f"\nruns={report['runs']} first request path={report['path']}")
+    print(f"{'':<22}{'median ms':>12}{'min ms':>10}")
+    for label, key in (("import main", "import_main_ms"), ("time to first request", "first_request_ms")):
+        print(f"{label:<22}{report[key]['median']:>12.1f}{report[key]['min']:>10.1f}")
+    print("\nslowest packages (self import time, median ms)")
+    for name, ms in report["slowest_packages_ms"].items():
+        print(f"  {name:<30}{ms:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Support desk worker cold-start benchmark")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL", "sqlite:///startup.db"))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/api/ai/stats", help="Endpoint polled for the first request")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest packages to list")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for the first response")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args.database_url, args.runs, args.path, args.top, args.timeout)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""Command-line tasks for the support desk.
+
+    python cli.py migrate
+    python cli.py import-archive support.mbox --format mbox --workers 8
+    python cli.py import-archive ~/Maildir --format maildir --analyze
+    python cli.py analyze-new --limit 500
+"""
+import argparse
+import itertools
+import mailbox
+import multiprocessing
+import time
+from typing import Optional
+
+from sqlalchemy import insert
+from sqlalchemy.schema import CreateIndex
+
+from database import BackgroundSessionLocal, Base, background_engine
+from models import Ticket, TicketStatus, TicketMessage, MessageDirection
+from email_ingestor import parse_message_bytes, extract_message_fields, generate_ticket_id, apply_ai_result
+from ai_processor import analyze_email
+
+
+def migrate():
+    """Create missing tables, and indexes added to existing tables. Safe to run on every deploy."""
+    Base.metadata.create_all(bind=background_engine)
+
+    # create_all skips tables that already exist, so indexes added later are created here.
+    # IF NOT EXISTS rather than reflection, which skips expression indexes on SQLite.
+    with background_engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+    print(f"Schema up to date: {len(Base.metadata.tables)} tables")
+
+
+def iter_archive(path: str, archive_format: str):
+    """Yield raw message bytes one at a time from an mbox file or Maildir."""
+    if archive_format == "mbox":
+        archive = mailbox.mbox(path, factory=None, create=False)
+    else:
+        archive = mailbox.Maildir(path, factory=None, create=False)
+    try:
+        for key in archive.iterkeys():
+            yield archive.get_bytes(key)
+    finally:
+        archive.close()
+
+
+def parse_archived_message(raw: bytes) -> Optional[dict]:
+    """Worker: parse one raw message into ticket fields (attachments are dropped)."""
+    try:
+        return extract_message_fields(parse_message_bytes(raw))
+    except Exception:
+        return None
+
+
+def _unique_ticket_ids(db, count: int) -> list:
+    """Generate ticket IDs, re-rolling any that collide within the batch or the table."""
+    ticket_ids = set()
+    while len(ticket_ids) < count:
+        candidates = {generate_ticket_id() for _ in range(count - len(ticket_ids))} - ticket_ids
+        taken = {
+            ticket_id for (ticket_id,) in db.query(Ticket.ticket_id).filter(Ticket.ticket_id.in_(candidates))
+        }
+        ticket_ids |= candidates - taken
+    return list(ticket_ids)
+
+
+def _insert_batch(db, parsed: list) -> tuple:
+    """Bulk insert tickets and their Message-IDs, skipping messages already imported.
+
+    A message whose In-Reply-To/References match a message already imported, in
+    this batch or an earlier one, is added to that ticket's thread instead of
+    opening a new ticket. Returns (new ticket IDs, number of replies threaded).
+    """
+    lookup_ids = set()
+    for fields in parsed:
+        if fields["message_id"]:
+            lookup_ids.add(fields["message_id"])
+        lookup_ids.update(fields["references"])
+    threads = {}
+    if lookup_ids:
+        threads = {
+            message_id: ticket_id for message_id, ticket_id in db.query(
+                TicketMessage.message_id, TicketMessage.ticket_id
+            ).filter(TicketMessage.message_id.in_(lookup_ids))
+        }
+
+    new_ticket_ids = iter(_unique_ticket_ids(db, len(parsed)))
+    ticket_rows = []
+    message_rows = []
+    replies = 0
+    for fields in parsed:
+        message_id = fields["message_id"]
+        if message_id in threads:
+            continue
+
+        thread_ticket_id = next((threads[ref] for ref in fields["references"] if ref in threads), None)
+        if thread_ticket_id:
+            message_rows.append({
+                "ticket_id": thread_ticket_id,
+                "message_id": message_id,
+                "in_reply_to": fields["in_reply_to"],
+                "direction": MessageDirection.INBOUND.value,
+                "sender_email": fields["sender_email"],
+                "body": fields["body"],
+                "received_at": fields["received_at"],
+            })
+            if message_id:
+                threads[message_id] = thread_ticket_id
+            replies += 1
+            continue
+
+        ticket_id = next(new_ticket_ids)
+        if message_id:
+            threads[message_id] = ticket_id
+        ticket_rows.append({
+            "ticket_id": ticket_id,
+            "sender_email": fields["sender_email"],
+            "sender_name": fields["sender_name"],
+            "email_subject": fields["subject"][:500],
+            "email_body": fields["body"],
+            "received_at": fields["received_at"],
+            "status": TicketStatus.NEW.value,
+        })
+        message_rows.append({
+            "ticket_id": ticket_id,
+            "message_id": message_id,
+            "in_reply_to": fields["in_reply_to"],
+            "direction": MessageDirection.INBOUND.value,
+            "sender_email": fields["sender_email"],
+            "body": None,
+            "received_at": fields["received_at"],
+        })
+
+    if ticket_rows:
+        db.execute(insert(Ticket), ticket_rows)
+    if message_rows:
+        db.execute(insert(TicketMessage), message_rows)
+        db.commit()
+    return [row["ticket_id"] for row in ticket_rows], replies
+
+
+def analyze_ticket(db, ticket: Ticket):
+    ai_result = analyze_email(
+        ticket_id=ticket.ticket_id,
+        sender_email=ticket.sender_email,
+        subject=ticket.email_subject,
+        body=ticket.email_body,
+        received_at=ticket.received_at.isoformat() if ticket.received_at else ""
+    )
+    apply_ai_result(ticket, ai_result)
+    db.commit()
+
+
+def import_archive(path: str, archive_format: str, workers: int, batch_size: int, analyze: bool):
+    """Stream an archive through a process pool and bulk insert the resulting tickets."""
+    db = BackgroundSessionLocal()
+    started = time.perf_counter()
+    seen = imported = threaded = failed = 0
+
+    try:
+        with multiprocessing.Pool(processes=workers) as pool:
+            raw_messages = iter_archive(path, archive_format)
+            while True:
+                # Read one batch at a time so memory stays bounded by batch_size.
+                window = list(itertools.islice(raw_messages, batch_size))
+                if not window:
+                    break
+                results = pool.map(parse_archived_message, window, chunksize=max(1, len(window) // (workers * 4)))
+                parsed = [fields for fields in results if fields is not None]
+                seen += len(window)
+                failed += len(window) - len(parsed)
+
+                ticket_ids, replies = _insert_batch(db, parsed)
+                imported += len(ticket_ids)
+                threaded += replies
+
+                if analyze:
+                    for ticket in db.query(Ticket).filter(Ticket.ticket_id.in_(ticket_ids)):
+                        analyze_ticket(db, ticket)
+
+                elapsed = time.perf_counter() - started
+                print(f"Read {seen}, imported {imported}, threaded {threaded} replies, unparseable {failed} "
+                      f"({seen / elapsed * 60:.0f} messages/min)", flush=True)
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"Done: {imported} tickets and {threaded} replies imported from {seen} messages in {elapsed:.1f}s")
+
+
+def analyze_new(limit: int):
+    """Run AI analysis for tickets still in the NEW state, e.g. after a deferred import."""
+    db = BackgroundSessionLocal()
+    try:
+        tickets = db.query(Ticket).filter(
+            Ticket.status == TicketStatus.NEW.value
+        ).order_by(Ticket.received_at).limit(limit).all()
+        for n, ticket in enumerate(tickets, start=1):
+            analyze_ticket(db, ticket)
+            print(f"Analyzed {n}/{len(tickets)}: {ticket.ticket_id}", flush=True)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="InfinityWork Support Desk tasks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("migrate", help="Create missing database tables before starting the app")
+
+    import_parser = subparsers.add_parser("import-archive", help="Bulk import an mbox file or Maildir as tickets")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=["mbox", "maildir"], default="mbox")
+    import_parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    import_parser.add_argument("--batch-size", type=int, default=2000)
+    import_parser.add_argument("--analyze", action="store_true",
+                               help="Analyze tickets during import instead of leaving them as new")
+
+    analyze_parser = subparsers.add_parser("analyze-new", help="Analyze tickets still in the new state")
+    analyze_parser.add_argument("--limit", type=int, default=100)
+
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        migrate()
+    elif args.command == "import-archive":
+        import_archive(args.path, args.format, args.workers, args.batch_size, args.analyze)
+    elif args.command == "analyze-new":
+        analyze_new(args.limit)
+
+
+if __name__ == "__main__":
+    main()
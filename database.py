@@ -1,16 +1,97 @@
 import os
+import threading
+import time
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
+DATABASE_READ_URL = os.environ.get("DATABASE_READ_URL")
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_recycle=300,
-    pool_pre_ping=True,
-)
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "300"))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", "30"))
+
+# Pool size and overflow per workload, overridable as e.g. DB_WEB_POOL_SIZE / DB_WEB_MAX_OVERFLOW.
+POOL_DEFAULTS = {
+    "web": (5, 10),
+    "read": (10, 20),
+    "background": (3, 2),
+}
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that records how often and how long callers wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self.metrics_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self.metrics_lock:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.checkouts, pool.timeouts = self.checkouts, self.timeouts
+        pool.wait_total, pool.wait_max = self.wait_total, self.wait_max
+        return pool
+
+    def stats(self) -> dict:
+        with self.metrics_lock:
+            checkouts, timeouts, wait_total, wait_max = self.checkouts, self.timeouts, self.wait_total, self.wait_max
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": max(0, self.overflow()),
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "avg_wait_ms": round(wait_total / checkouts * 1000, 2) if checkouts else 0.0,
+            "max_wait_ms": round(wait_max * 1000, 2),
+        }
+
+
+def make_engine(url: str, workload: str):
+    pool_size, max_overflow = POOL_DEFAULTS[workload]
+    prefix = f"DB_{workload.upper()}"
+    return create_engine(
+        url,
+        poolclass=MeteredQueuePool,
+        pool_size=int(os.environ.get(f"{prefix}_POOL_SIZE", pool_size)),
+        max_overflow=int(os.environ.get(f"{prefix}_MAX_OVERFLOW", max_overflow)),
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+
+
+# Web requests that write, and cached page renders, use the primary.
+engine = make_engine(DATABASE_URL, "web")
+# Uncached /api/* reads go to the replica when one is configured.
+read_engine = make_engine(DATABASE_READ_URL, "read") if DATABASE_READ_URL else engine
+# Scheduler jobs and CLI tasks get their own primary pool so browsing cannot starve ingestion.
+background_engine = make_engine(DATABASE_URL, "background")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+BackgroundSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=background_engine)
 
 Base = declarative_base()
 
@@ -20,3 +101,17 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_pool_stats() -> dict:
+    """Connection pool usage and checkout wait times per workload."""
+    engines = {"web": engine, "background": background_engine}
+    if read_engine is not engine:
+        engines["read"] = read_engine
+    return {name: e.pool.stats() for name, e in engines.items()}
@@ -1,12 +1,30 @@
 import email
+import os
+import re
 import uuid
 from datetime import datetime
 from email.header import decode_header
-from imapclient import IMAPClient
+from email.message import Message
+from email.parser import BytesFeedParser
+from email.policy import compat32
+from html.parser import HTMLParser
+from typing import Optional
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from models import Ticket, EmailConfig, TicketStatus
+from models import Ticket, EmailConfig, TicketStatus, TicketAttachment, TicketMessage, MessageDirection
 from ai_processor import analyze_email
+import attachment_store
+import similarity
+import flood_guard
+import page_cache
+import events
+
+MESSAGE_ID_RE = re.compile(r"<[^<>\s]+>")
+THREAD_CONTEXT_CHARS = 1000
+
+MAX_MESSAGE_BYTES = int(os.environ.get("MAX_MESSAGE_BYTES", str(10 * 1024 * 1024)))
+FETCH_CHUNK_BYTES = 1024 * 1024
 
 
 def decode_email_header(header_value):
@@ -27,36 +45,442 @@ def decode_email_header(header_value):
     return ' '.join(decoded_parts)
 
 
+def is_attachment(part) -> bool:
+    """Whether a (non-container) MIME part is an attachment rather than body text."""
+    if part.get_content_maintype() in ("multipart", "message"):
+        return False
+    if "attachment" in str(part.get("Content-Disposition", "")).lower():
+        return True
+    if part.get_filename():
+        return True
+    return part.get_content_maintype() != "text"
+
+
+def _decoded_size(part, payload: str) -> int:
+    encoding = str(part.get("Content-Transfer-Encoding", "")).strip().lower()
+    if encoding == "base64":
+        data = "".join(payload.split())
+        return max(0, len(data) * 3 // 4 - data[-2:].count("="))
+    return len(payload)
+
+
+class AttachmentDiscardingMessage(Message):
+    """Message that keeps only name, size and type for attachment parts.
+
+    The feed parser sets headers before the payload, so the part can be
+    classified and its payload dropped before it is stored on the tree.
+    With `keep_attachments`, the decoded bytes are kept in `attachment_data`
+    instead, for `save_attachments` to store once the message has a ticket.
+
+    `is_cut_off` reports whether payloads set now belong to parts left open
+    when the byte budget ran out. Such parts are flagged `payload_truncated`
+    and a cut-off attachment's bytes are never kept.
+    """
+
+    def __init__(self, policy=compat32, keep_attachments=False, is_cut_off=None):
+        super().__init__(policy)
+        self.attachment = None
+        self.attachment_data = None
+        self.payload_truncated = False
+        self._keep_attachments = keep_attachments
+        self._is_cut_off = is_cut_off
+
+    def set_payload(self, payload, charset=None):
+        if isinstance(payload, str) and payload and self._is_cut_off is not None and self._is_cut_off():
+            self.payload_truncated = True
+        if isinstance(payload, str) and payload and is_attachment(self):
+            self.attachment = {
+                "filename": decode_email_header(self.get_filename()) or "attachment",
+                "content_type": self.get_content_type(),
+                "size": _decoded_size(self, payload),
+            }
+            if self.payload_truncated:
+                self.attachment["truncated"] = True
+            elif self._keep_attachments:
+                super().set_payload(payload, charset)
+                self.attachment_data = self.get_payload(decode=True)
+            payload = ""
+        super().set_payload(payload, charset)
+
+
+class StreamingMessageParser:
+    """Incrementally parse a message from byte chunks, stopping at a byte budget."""
+
+    def __init__(self, max_bytes: int = MAX_MESSAGE_BYTES, keep_attachments: bool = False):
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.truncated = False
+        self._closing = False
+        self._parser = BytesFeedParser(
+            _factory=lambda policy=compat32: AttachmentDiscardingMessage(
+                policy, keep_attachments, is_cut_off=lambda: self._closing and self.truncated
+            )
+        )
+
+    def feed(self, chunk: bytes) -> bool:
+        """Feed a chunk; returns False once the budget is exhausted."""
+        remaining = self.max_bytes - self.bytes_read
+        if len(chunk) > remaining:
+            chunk = chunk[:remaining]
+            self.truncated = True
+        self._parser.feed(chunk)
+        self.bytes_read += len(chunk)
+        return not self.truncated
+
+    def close(self) -> Message:
+        # Parts still open at this point only get the bytes read before the budget ran out.
+        self._closing = True
+        msg = self._parser.close()
+        msg.truncated = self.truncated
+        return msg
+
+
+def parse_message_bytes(data: bytes, max_bytes: int = MAX_MESSAGE_BYTES, keep_attachments: bool = False) -> Message:
+    """Parse a complete raw message with the streaming parser."""
+    parser = StreamingMessageParser(max_bytes, keep_attachments)
+    for offset in range(0, len(data), FETCH_CHUNK_BYTES):
+        if not parser.feed(data[offset:offset + FETCH_CHUNK_BYTES]):
+            break
+    return parser.close()
+
+
+def fetch_message(client, uid: int, max_bytes: int = MAX_MESSAGE_BYTES, keep_attachments: bool = False) -> Message:
+    """Fetch a message in partial BODY.PEEK chunks, parsing as the bytes arrive."""
+    size = client.fetch([uid], ['RFC822.SIZE'])[uid][b'RFC822.SIZE']
+    parser = StreamingMessageParser(max_bytes, keep_attachments)
+    offset = 0
+    
+    while offset < size:
+        length = min(FETCH_CHUNK_BYTES, size - offset)
+        response = client.fetch([uid], [f'BODY.PEEK[]<{offset}.{length}>'])[uid]
+        chunk = next((value for key, value in response.items() if key.startswith(b'BODY[')), None)
+        if not chunk:
+            break
+        offset += len(chunk)
+        if not parser.feed(chunk):
+            break
+    
+    return parser.close()
+
+
+class _HTMLTextExtractor(HTMLParser):
+    BLOCK_TAGS = {"br", "p", "div", "li", "tr", "table", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote"}
+    SKIP_TAGS = {"script", "style", "head"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """Convert an HTML email body to readable plain text."""
+    extractor = _HTMLTextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    lines = [re.sub(r"[ \t\xa0]+", " ", line).strip() for line in "".join(extractor.parts).splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def _decode_part(part) -> str:
+    payload = part.get_payload(decode=True)
+    if not payload:
+        return ""
+    charset = part.get_content_charset() or 'utf-8'
+    try:
+        return payload.decode(charset)
+    except (UnicodeDecodeError, LookupError):
+        return payload.decode('utf-8', errors='replace')
+
+
 def get_email_body(msg):
-    """Extract plain text body from email message."""
+    """Extract plain text body from email message, falling back to converted HTML."""
     body = ""
+    body_part = None
     
     if msg.is_multipart():
+        html_part = None
         for part in msg.walk():
-            content_type = part.get_content_type()
-            content_disposition = str(part.get("Content-Disposition", ""))
+            if part.is_multipart() or is_attachment(part):
+                continue
             
-            if content_type == "text/plain" and "attachment" not in content_disposition:
-                payload = part.get_payload(decode=True)
-                if payload:
-                    charset = part.get_content_charset() or 'utf-8'
-                    try:
-                        body = payload.decode(charset)
-                    except (UnicodeDecodeError, LookupError):
-                        body = payload.decode('utf-8', errors='replace')
+            content_type = part.get_content_type()
+            if content_type == "text/plain":
+                body = _decode_part(part)
+                body_part = part
                 break
+            if content_type == "text/html" and html_part is None:
+                html_part = part
+        
+        if not body and html_part is not None:
+            body = html_to_text(_decode_part(html_part))
+            body_part = html_part
     else:
-        payload = msg.get_payload(decode=True)
-        if payload:
-            charset = msg.get_content_charset() or 'utf-8'
-            try:
-                body = payload.decode(charset)
-            except (UnicodeDecodeError, LookupError):
-                body = payload.decode('utf-8', errors='replace')
+        body = _decode_part(msg)
+        body_part = msg
+        if msg.get_content_type() == "text/html":
+            body = html_to_text(body)
+    
+    # Only note truncation when the text itself was cut (or never arrived), not
+    # when the budget ran out inside an attachment after a complete body.
+    if getattr(body_part, "payload_truncated", False) or (not body and getattr(msg, "truncated", False)):
+        body = body.rstrip() + "\n\n[Message truncated: exceeded the size limit]"
     
     return body.strip()
 
 
+def get_attachment_metadata(msg) -> list:
+    """Name, size and content type of the attachments dropped while parsing."""
+    return [part.attachment for part in msg.walk() if getattr(part, "attachment", None)]
+
+
+def save_attachments(db: Session, ticket_id: str, msg):
+    """Store the attachments kept while parsing msg and record them against a ticket.
+
+    Blobs are only written here, once the message has a ticket, so skipped or
+    failed messages leave nothing behind. Attachments cut off by the size
+    limit were never kept and are skipped.
+    """
+    for part in msg.walk():
+        if getattr(part, "attachment_data", None) is None:
+            continue
+        part.attachment.update(attachment_store.store_blob(part.attachment_data))
+        part.attachment_data = None
+        db.add(TicketAttachment(
+            ticket_id=ticket_id,
+            filename=part.attachment["filename"][:255],
+            content_type=part.attachment["content_type"][:255],
+            size=part.attachment["size"],
+            sha256=part.attachment["sha256"]
+        ))
+
+
+def extract_message_fields(msg) -> dict:
+    """Pull the ticket-relevant fields out of a parsed message."""
+    from_header = msg.get('From', '')
+    sender_name, sender_email = email.utils.parseaddr(from_header)
+    
+    date_header = msg.get('Date', '')
+    try:
+        received_at = email.utils.parsedate_to_datetime(date_header)
+    except Exception:
+        received_at = datetime.utcnow()
+    
+    return {
+        "sender_email": sender_email,
+        "sender_name": decode_email_header(sender_name),
+        "subject": decode_email_header(msg.get('Subject', 'No Subject')),
+        "body": get_email_body(msg),
+        "received_at": received_at,
+        "message_id": next(iter(parse_message_ids(msg.get('Message-ID'))), None),
+        "in_reply_to": next(iter(parse_message_ids(msg.get('In-Reply-To'))), None),
+        "references": parse_message_ids(msg.get('In-Reply-To')) + parse_message_ids(msg.get('References')),
+    }
+
+
+def parse_message_ids(header_value) -> list:
+    """Extract <message-id> tokens from a Message-ID, In-Reply-To or References header."""
+    if not header_value:
+        return []
+    return MESSAGE_ID_RE.findall(str(header_value))
+
+
+def find_thread_ticket(db: Session, references: list) -> Optional[Ticket]:
+    """Find the ticket whose thread contains any of the referenced message IDs."""
+    if not references:
+        return None
+    
+    message = db.query(TicketMessage).filter(
+        TicketMessage.message_id.in_(references)
+    ).order_by(TicketMessage.id.desc()).first()
+    if not message:
+        return None
+    
+    return db.query(Ticket).filter(Ticket.ticket_id == message.ticket_id).first()
+
+
+def is_known_message(db: Session, message_id: str) -> bool:
+    return db.query(TicketMessage.id).filter(TicketMessage.message_id == message_id).first() is not None
+
+
+def build_thread_context(db: Session, ticket: Ticket) -> str:
+    """Compact summary of a thread so far, used instead of re-sending every message."""
+    message_count = db.query(TicketMessage).filter(TicketMessage.ticket_id == ticket.ticket_id).count()
+    lines = [
+        f"ORIGINAL SUBJECT: {ticket.email_subject}",
+        f"MESSAGES IN THREAD: {max(message_count, 1)}",
+        f"CATEGORY: {ticket.category or 'Unknown'}",
+        f"SUMMARY SO FAR: {ticket.summary or 'None'}",
+    ]
+    if ticket.approved_response:
+        lines.append(f"LAST REPLY TO CUSTOMER:\n{ticket.approved_response[:THREAD_CONTEXT_CHARS]}")
+    elif ticket.ai_response:
+        lines.append(f"PREVIOUS DRAFT (NOT SENT):\n{ticket.ai_response[:THREAD_CONTEXT_CHARS]}")
+    return "\n".join(lines)
+
+
+def apply_ai_result(ticket: Ticket, ai_result: dict):
+    """Copy an analysis result onto a ticket and queue it for approval."""
+    ticket.category = ai_result.get("category")
+    ticket.urgency = ai_result.get("urgency")
+    ticket.summary = ai_result.get("summary")
+    ticket.fix_steps = ai_result.get("fix_steps")
+    ticket.ai_response = ai_result.get("response")
+    ticket.confidence = ai_result.get("confidence")
+    ticket.escalation_required = ai_result.get("escalation_required", False)
+    ticket.status = TicketStatus.PENDING_APPROVAL.value
+
+
+def add_follow_up(
+    db: Session,
+    ticket: Ticket,
+    msg,
+    message_id: Optional[str],
+    in_reply_to: Optional[str],
+    sender_email: str,
+    subject: str,
+    body: str,
+    received_at: datetime
+):
+    """Attach a customer reply to an existing ticket and re-analyze only the new message."""
+    thread_context = build_thread_context(db, ticket)
+    old_status = ticket.status
+    
+    db.add(TicketMessage(
+        ticket_id=ticket.ticket_id,
+        message_id=message_id,
+        in_reply_to=in_reply_to,
+        direction=MessageDirection.INBOUND.value,
+        sender_email=sender_email,
+        body=body,
+        received_at=received_at
+    ))
+    save_attachments(db, ticket.ticket_id, msg)
+    db.commit()
+    
+    ai_result = analyze_email(
+        ticket_id=ticket.ticket_id,
+        sender_email=sender_email,
+        subject=subject,
+        body=body,
+        received_at=received_at.isoformat(),
+        thread_context=thread_context,
+        similar_resolutions=similarity.find_similar_tickets(db, subject, body, exclude_ticket_id=ticket.ticket_id)
+    )
+    
+    apply_ai_result(ticket, ai_result)
+    db.commit()
+    page_cache.invalidate_ticket(ticket.ticket_id)
+    events.ticket_status_changed(ticket, old_status)
+
+
+OPEN_STATUSES = (
+    TicketStatus.NEW.value,
+    TicketStatus.ANALYZED.value,
+    TicketStatus.PENDING_APPROVAL.value,
+    TicketStatus.APPROVED.value,
+)
+
+
+def collapse_message(
+    db: Session,
+    kind: str,
+    reason: str,
+    thread_ticket: Optional[Ticket],
+    msg,
+    message_id: Optional[str],
+    in_reply_to: Optional[str],
+    sender_email: str,
+    sender_name: str,
+    subject: str,
+    body: str,
+    received_at: datetime
+) -> Ticket:
+    """File a suppressed message without analysis.
+
+    Automated mail is recorded on its thread or the sender's latest ticket
+    and changes nothing else. A flooding sender's messages collapse into one
+    open ticket, which is put back in front of an agent; a new unanalyzed
+    ticket is opened when the sender has none open.
+    """
+    if kind == flood_guard.FLOOD:
+        if thread_ticket is not None and thread_ticket.status in OPEN_STATUSES:
+            ticket = thread_ticket
+        else:
+            ticket = db.query(Ticket).filter(
+                func.lower(Ticket.sender_email) == sender_email.lower(),
+                Ticket.status.in_(OPEN_STATUSES)
+            ).order_by(Ticket.id.desc()).first()
+    else:
+        ticket = thread_ticket or db.query(Ticket).filter(
+            func.lower(Ticket.sender_email) == sender_email.lower()
+        ).order_by(Ticket.id.desc()).first()
+    
+    if ticket is None:
+        ticket = Ticket(
+            ticket_id=generate_ticket_id(),
+            sender_email=sender_email,
+            sender_name=sender_name,
+            email_subject=subject,
+            email_body=body,
+            received_at=received_at,
+            status=TicketStatus.NEW.value,
+            summary=f"Not analyzed: {reason}",
+            escalation_required=True
+        )
+        db.add(ticket)
+        db.add(TicketMessage(
+            ticket_id=ticket.ticket_id,
+            message_id=message_id,
+            in_reply_to=in_reply_to,
+            direction=MessageDirection.INBOUND.value,
+            sender_email=sender_email,
+            received_at=received_at
+        ))
+        save_attachments(db, ticket.ticket_id, msg)
+        db.commit()
+        events.ticket_created(ticket)
+    else:
+        old_status = ticket.status
+        db.add(TicketMessage(
+            ticket_id=ticket.ticket_id,
+            message_id=message_id,
+            in_reply_to=in_reply_to,
+            direction=MessageDirection.INBOUND.value,
+            sender_email=sender_email,
+            body=f"[Not analyzed: {reason}]\n\n{body}",
+            received_at=received_at
+        ))
+        save_attachments(db, ticket.ticket_id, msg)
+        if kind == flood_guard.FLOOD:
+            # An approved or drafted reply no longer covers everything the customer said.
+            if ticket.status != TicketStatus.NEW.value:
+                ticket.status = TicketStatus.PENDING_APPROVAL.value
+            ticket.escalation_required = True
+        db.commit()
+        if kind == flood_guard.FLOOD:
+            events.ticket_status_changed(ticket, old_status)
+    
+    page_cache.invalidate_ticket(ticket.ticket_id)
+    return ticket
+
+
 def generate_ticket_id():
     """Generate a unique ticket ID."""
     timestamp = datetime.utcnow().strftime("%Y%m%d")
@@ -64,38 +488,71 @@ def generate_ticket_id():
     return f"TKT-{timestamp}-{unique_part}"
 
 
-def fetch_and_process_emails(db: Session, config: EmailConfig) -> dict:
-    """Fetch unread emails from IMAP and create tickets."""
+def fetch_and_process_emails(db: Session, config: EmailConfig, max_messages: Optional[int] = None) -> dict:
+    """Fetch unread emails from IMAP and create tickets.
+
+    With `max_messages`, at most that many are processed and `capped` reports
+    whether more were waiting.
+    """
     results = {
         "processed": 0,
         "errors": [],
-        "tickets_created": []
+        "tickets_created": [],
+        "tickets_updated": [],
+        "suppressed": [],
+        "capped": False
     }
+    flood_guard.limiter.prune()
     
     try:
+        from imapclient import IMAPClient
+        
         with IMAPClient(config.imap_server, port=config.imap_port, ssl=True) as client:
             client.login(config.imap_username, config.imap_password)
             client.select_folder('INBOX')
             
             messages = client.search(['UNSEEN'])
+            if max_messages is not None and len(messages) > max_messages:
+                messages = messages[:max_messages]
+                results["capped"] = True
             
             for uid in messages:
                 try:
-                    raw_message = client.fetch([uid], ['RFC822'])
-                    email_data = raw_message[uid][b'RFC822']
-                    msg = email.message_from_bytes(email_data)
+                    msg = fetch_message(client, uid, keep_attachments=True)
                     
-                    from_header = msg.get('From', '')
-                    sender_email = email.utils.parseaddr(from_header)[1]
-                    sender_name = decode_email_header(email.utils.parseaddr(from_header)[0])
-                    subject = decode_email_header(msg.get('Subject', 'No Subject'))
-                    body = get_email_body(msg)
+                    fields = extract_message_fields(msg)
+                    sender_email = fields["sender_email"]
+                    sender_name = fields["sender_name"]
+                    subject = fields["subject"]
+                    body = fields["body"]
+                    received_at = fields["received_at"]
+                    message_id = fields["message_id"]
+                    in_reply_to = fields["in_reply_to"]
+                    references = fields["references"]
                     
-                    date_header = msg.get('Date', '')
-                    try:
-                        received_at = email.utils.parsedate_to_datetime(date_header)
-                    except Exception:
-                        received_at = datetime.utcnow()
+                    if message_id and is_known_message(db, message_id):
+                        client.add_flags([uid], ['\\Seen'])
+                        continue
+                    
+                    thread_ticket = find_thread_ticket(db, references)
+                    
+                    suppressed = flood_guard.check_message(db, msg, sender_email, message_id, references)
+                    if suppressed:
+                        kind, reason = suppressed
+                        ticket = collapse_message(
+                            db, kind, reason, thread_ticket, msg, message_id, in_reply_to,
+                            sender_email, sender_name, subject, body, received_at
+                        )
+                        results["suppressed"].append({"ticket_id": ticket.ticket_id, "reason": reason})
+                        client.add_flags([uid], ['\\Seen'])
+                        continue
+                    
+                    if thread_ticket:
+                        add_follow_up(db, thread_ticket, msg, message_id, in_reply_to, sender_email, subject, body, received_at)
+                        results["processed"] += 1
+                        results["tickets_updated"].append(thread_ticket.ticket_id)
+                        client.add_flags([uid], ['\\Seen'])
+                        continue
                     
                     ticket_id = generate_ticket_id()
                     
@@ -110,6 +567,15 @@ def fetch_and_process_emails(db: Session, config: EmailConfig) -> dict:
                     )
                     
                     db.add(ticket)
+                    db.add(TicketMessage(
+                        ticket_id=ticket_id,
+                        message_id=message_id,
+                        in_reply_to=in_reply_to,
+                        direction=MessageDirection.INBOUND.value,
+                        sender_email=sender_email,
+                        received_at=received_at
+                    ))
+                    save_attachments(db, ticket_id, msg)
                     db.commit()
                     db.refresh(ticket)
                     
@@ -118,19 +584,14 @@ def fetch_and_process_emails(db: Session, config: EmailConfig) -> dict:
                         sender_email=sender_email,
                         subject=subject,
                         body=body,
-                        received_at=received_at.isoformat()
+                        received_at=received_at.isoformat(),
+                        similar_resolutions=similarity.find_similar_tickets(db, subject, body)
                     )
                     
-                    ticket.category = ai_result.get("category")
-                    ticket.urgency = ai_result.get("urgency")
-                    ticket.summary = ai_result.get("summary")
-                    ticket.fix_steps = ai_result.get("fix_steps")
-                    ticket.ai_response = ai_result.get("response")
-                    ticket.confidence = ai_result.get("confidence")
-                    ticket.escalation_required = ai_result.get("escalation_required", False)
-                    ticket.status = TicketStatus.PENDING_APPROVAL.value
-                    
+                    apply_ai_result(ticket, ai_result)
                     db.commit()
+                    page_cache.invalidate_ticket(ticket_id)
+                    events.ticket_created(ticket)
                     
                     results["processed"] += 1
                     results["tickets_created"].append(ticket_id)
@@ -139,6 +600,13 @@ def fetch_and_process_emails(db: Session, config: EmailConfig) -> dict:
                     
                 except Exception as e:
                     results["errors"].append(f"Error processing message {uid}: {str(e)}")
+                    db.rollback()
+                    # BODY.PEEK does not set \Seen, so mark failures explicitly to keep
+                    # them from being fetched and parsed again on every poll.
+                    try:
+                        client.add_flags([uid], ['\\Seen'])
+                    except Exception:
+                        pass
                     continue
                     
     except Exception as e:
@@ -171,19 +639,14 @@ def create_test_ticket(db: Session, sender_email: str, subject: str, body: str)
         sender_email=sender_email,
         subject=subject,
         body=body,
-        received_at=received_at.isoformat()
+        received_at=received_at.isoformat(),
+        similar_resolutions=similarity.find_similar_tickets(db, subject, body)
     )
     
-    ticket.category = ai_result.get("category")
-    ticket.urgency = ai_result.get("urgency")
-    ticket.summary = ai_result.get("summary")
-    ticket.fix_steps = ai_result.get("fix_steps")
-    ticket.ai_response = ai_result.get("response")
-    ticket.confidence = ai_result.get("confidence")
-    ticket.escalation_required = ai_result.get("escalation_required", False)
-    ticket.status = TicketStatus.PENDING_APPROVAL.value
-    
+    apply_ai_result(ticket, ai_result)
     db.commit()
     db.refresh(ticket)
+    page_cache.invalidate_ticket(ticket_id)
+    events.ticket_created(ticket)
     
     return ticket
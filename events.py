@@ -0,0 +1,137 @@
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+
+from sqlalchemy import text
+
+from database import engine, background_engine
+
+logger = logging.getLogger(__name__)
+
+EVENTS_USE_PG_NOTIFY = os.environ.get("EVENTS_USE_PG_NOTIFY", "").lower() in ("1", "true", "yes")
+EVENTS_PG_CHANNEL = "ticket_events"
+SUBSCRIBER_QUEUE_SIZE = 100
+
+_subscribers = set()
+_subscribers_lock = threading.Lock()
+_listener_stop = threading.Event()
+_listener_thread = None
+
+
+def subscribe() -> asyncio.Queue:
+    """Register a queue on the running event loop that receives ticket events."""
+    queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    with _subscribers_lock:
+        _subscribers.add((asyncio.get_running_loop(), queue))
+    return queue
+
+
+def unsubscribe(queue: asyncio.Queue):
+    with _subscribers_lock:
+        for entry in [entry for entry in _subscribers if entry[1] is queue]:
+            _subscribers.discard(entry)
+
+
+def _enqueue(queue: asyncio.Queue, event: dict):
+    if queue.full():
+        # A slow client missed events; tell it to reload instead of applying a partial diff.
+        while not queue.empty():
+            queue.get_nowait()
+        event = {"type": "resync", "data": {}}
+    queue.put_nowait(event)
+
+
+def _dispatch(event: dict):
+    with _subscribers_lock:
+        subscribers = list(_subscribers)
+    for loop, queue in subscribers:
+        try:
+            loop.call_soon_threadsafe(_enqueue, queue, event)
+        except RuntimeError:
+            unsubscribe(queue)
+
+
+def publish(event_type: str, data: dict):
+    """Publish an event to every connected client, via Postgres NOTIFY when enabled."""
+    event = {"type": event_type, "data": data}
+    if not EVENTS_USE_PG_NOTIFY:
+        _dispatch(event)
+        return
+    try:
+        with engine.begin() as conn:
+            conn.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": EVENTS_PG_CHANNEL, "payload": json.dumps(event)}
+            )
+    except Exception as e:
+        logger.error(f"Failed to publish {event_type} event: {str(e)}")
+
+
+def ticket_payload(ticket) -> dict:
+    """Fields the dashboard needs to render or update a ticket row."""
+    return {
+        "ticket_id": ticket.ticket_id,
+        "email_subject": ticket.email_subject,
+        "sender_email": ticket.sender_email,
+        "category": ticket.category,
+        "urgency": ticket.urgency,
+        "status": ticket.status,
+        "created_at": ticket.created_at.strftime("%Y-%m-%d %H:%M") if ticket.created_at else None,
+    }
+
+
+def ticket_created(ticket):
+    publish("ticket_created", ticket_payload(ticket))
+
+
+def ticket_status_changed(ticket, old_status: str):
+    data = ticket_payload(ticket)
+    data["old_status"] = old_status
+    publish("status_changed", data)
+
+
+def _listen():
+    """Relay Postgres notifications on the events channel to local subscribers."""
+    while not _listener_stop.is_set():
+        try:
+            # The LISTEN connection is held for good, so take it from the background pool.
+            raw = background_engine.raw_connection()
+            try:
+                conn = raw.driver_connection
+                conn.autocommit = True
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {EVENTS_PG_CHANNEL}")
+                while not _listener_stop.is_set():
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        _dispatch(json.loads(notify.payload))
+            finally:
+                raw.invalidate()
+        except Exception as e:
+            logger.error(f"Event listener error: {str(e)}")
+            _listener_stop.wait(5)
+
+
+def start_listener():
+    """Start the LISTEN thread when events are routed through Postgres."""
+    global _listener_thread
+    if not EVENTS_USE_PG_NOTIFY or _listener_thread is not None:
+        return
+    _listener_stop.clear()
+    _listener_thread = threading.Thread(target=_listen, name="ticket-events-listener", daemon=True)
+    _listener_thread.start()
+
+
+def stop_listener():
+    global _listener_thread
+    if _listener_thread is None:
+        return
+    _listener_stop.set()
+    _listener_thread.join(timeout=10)
+    _listener_thread = None
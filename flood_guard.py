@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import TicketMessage, MessageDirection
+
+FLOOD_WINDOW_SECONDS = int(os.environ.get("FLOOD_WINDOW_SECONDS", "600"))
+FLOOD_MAX_MESSAGES = int(os.environ.get("FLOOD_MAX_MESSAGES", "5"))
+
+AUTO_PRECEDENCE = {"bulk", "junk", "list", "auto_reply"}
+# X-Auto-Response-Suppress is deliberately absent: it asks others not to auto-reply and
+# is set on ordinary mail, including our own approved replies.
+AUTO_REPLY_HEADERS = ("X-Autoreply", "X-Autorespond")
+
+AUTOMATED = "automated"
+FLOOD = "flood"
+
+
+class SlidingWindowLimiter:
+    """Per-key event counts over a sliding time window, kept in memory."""
+
+    def __init__(self, limit: int, window_seconds: int):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self._events = {}
+        self._lock = threading.Lock()
+
+    def has_history(self, key: str) -> bool:
+        with self._lock:
+            return key in self._events
+
+    def seed(self, key: str, timestamps: list):
+        """Load prior events for a key this process has not seen, e.g. from the database."""
+        with self._lock:
+            self._events.setdefault(key, deque(sorted(timestamps)))
+
+    def hit(self, key: str, now: Optional[float] = None) -> bool:
+        """Record an event; returns True when the key is over its limit."""
+        now = time.time() if now is None else now
+        cutoff = now - self.window_seconds
+        with self._lock:
+            events = self._events.setdefault(key, deque())
+            while events and events[0] < cutoff:
+                events.popleft()
+            events.append(now)
+            return len(events) > self.limit
+
+    def prune(self, now: Optional[float] = None):
+        cutoff = (time.time() if now is None else now) - self.window_seconds
+        with self._lock:
+            for key in [key for key, events in self._events.items() if not events or events[-1] < cutoff]:
+                del self._events[key]
+
+
+limiter = SlidingWindowLimiter(FLOOD_MAX_MESSAGES, FLOOD_WINDOW_SECONDS)
+
+
+def auto_generated_reason(msg) -> Optional[str]:
+    """Why a message looks machine-generated (RFC 3834 and common vendor headers), if it does."""
+    auto_submitted = str(msg.get("Auto-Submitted", "")).strip().lower()
+    if auto_submitted and auto_submitted != "no":
+        return f"Auto-Submitted: {auto_submitted}"
+
+    precedence = str(msg.get("Precedence", "")).strip().lower()
+    if precedence in AUTO_PRECEDENCE:
+        return f"Precedence: {precedence}"
+
+    for header in AUTO_REPLY_HEADERS:
+        if msg.get(header):
+            return f"{header} present"
+    return None
+
+
+def is_our_message(db: Session, message_ids: list) -> bool:
+    """Whether any of the IDs belongs to a reply we sent."""
+    if not message_ids:
+        return False
+    return db.query(TicketMessage.id).filter(
+        TicketMessage.direction == MessageDirection.OUTBOUND.value,
+        TicketMessage.message_id.in_(message_ids)
+    ).first() is not None
+
+
+def _seed_from_db(db: Session, sender: str):
+    since = datetime.utcnow() - timedelta(seconds=FLOOD_WINDOW_SECONDS)
+    rows = db.query(TicketMessage.created_at).filter(
+        TicketMessage.direction == MessageDirection.INBOUND.value,
+        func.lower(TicketMessage.sender_email) == sender,
+        TicketMessage.created_at >= since
+    ).all()
+    limiter.seed(sender, [
+        (created_at if created_at.tzinfo else created_at.replace(tzinfo=timezone.utc)).timestamp()
+        for (created_at,) in rows if created_at
+    ])
+
+
+def check_message(db: Session, msg, sender_email: str, message_id: Optional[str], references: list) -> Optional[tuple]:
+    """Return (kind, reason) when an inbound message must skip analysis, or None.
+
+    `kind` is AUTOMATED for loops and machine-generated mail, or FLOOD for a
+    sender over the rate limit.
+
+    Every call counts towards the sender's rate limit. The in-memory window is
+    seeded from recent inbound messages in the database the first time a sender
+    is seen, so restarts and other workers' ingestion still count.
+    """
+    sender = (sender_email or "").lower()
+    if sender and not limiter.has_history(sender):
+        _seed_from_db(db, sender)
+    over_limit = bool(sender) and limiter.hit(sender)
+
+    auto_reason = auto_generated_reason(msg)
+    if auto_reason:
+        if is_our_message(db, references):
+            return AUTOMATED, f"mail loop: automated reply to our message ({auto_reason})"
+        return AUTOMATED, f"automated message ({auto_reason})"
+
+    if over_limit:
+        return FLOOD, f"sender flood: more than {FLOOD_MAX_MESSAGES} messages in {FLOOD_WINDOW_SECONDS}s"
+    return None
@@ -2,10 +2,13 @@ import asyncio
 from datetime import datetime
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import aiosmtplib
+from email.utils import make_msgid
+from typing import Optional
 from sqlalchemy.orm import Session
 
-from models import Ticket, EmailConfig, TicketStatus
+from models import Ticket, EmailConfig, TicketStatus, TicketMessage, MessageDirection
+import page_cache
+import events
 
 
 async def send_email_async(
@@ -17,14 +20,24 @@ async def send_email_async(
     from_name: str,
     to_email: str,
     subject: str,
-    body: str
+    body: str,
+    in_reply_to: Optional[str] = None,
+    references: Optional[str] = None
 ) -> dict:
     """Send an email using SMTP asynchronously."""
     try:
+        message_id = make_msgid(domain=from_email.rpartition("@")[2] or None)
+        
         msg = MIMEMultipart('alternative')
         msg['Subject'] = f"Re: {subject}"
         msg['From'] = f"{from_name} <{from_email}>"
         msg['To'] = to_email
+        msg['Message-ID'] = message_id
+        # Ask Exchange-style servers not to answer with out-of-office or other auto-replies.
+        msg['X-Auto-Response-Suppress'] = 'All'
+        if in_reply_to:
+            msg['In-Reply-To'] = in_reply_to
+            msg['References'] = references or in_reply_to
         
         text_part = MIMEText(body, 'plain', 'utf-8')
         msg.attach(text_part)
@@ -33,6 +46,8 @@ async def send_email_async(
         html_part = MIMEText(f"<html><body>{html_body}</body></html>", 'html', 'utf-8')
         msg.attach(html_part)
         
+        import aiosmtplib
+        
         await aiosmtplib.send(
             msg,
             hostname=smtp_server,
@@ -42,7 +57,7 @@ async def send_email_async(
             start_tls=True
         )
         
-        return {"success": True, "message": "Email sent successfully"}
+        return {"success": True, "message": "Email sent successfully", "message_id": message_id}
         
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -56,6 +71,12 @@ async def send_approved_ticket_async(db: Session, ticket: Ticket, config: EmailC
     if not ticket.approved_response:
         return {"success": False, "error": "No approved response found"}
     
+    thread = db.query(TicketMessage).filter(
+        TicketMessage.ticket_id == ticket.ticket_id,
+        TicketMessage.message_id.isnot(None)
+    ).order_by(TicketMessage.id).all()
+    last_inbound = next((m for m in reversed(thread) if m.direction == MessageDirection.INBOUND.value), None)
+    
     result = await send_email_async(
         smtp_server=config.smtp_server,
         smtp_port=config.smtp_port,
@@ -65,13 +86,26 @@ async def send_approved_ticket_async(db: Session, ticket: Ticket, config: EmailC
         from_name=config.from_name,
         to_email=ticket.sender_email,
         subject=ticket.email_subject,
-        body=ticket.approved_response
+        body=ticket.approved_response,
+        in_reply_to=last_inbound.message_id if last_inbound else None,
+        references=" ".join(m.message_id for m in thread) or None
     )
     
     if result.get("success"):
         ticket.status = TicketStatus.SENT.value
         ticket.sent_at = datetime.utcnow()
+        db.add(TicketMessage(
+            ticket_id=ticket.ticket_id,
+            message_id=result.get("message_id"),
+            in_reply_to=last_inbound.message_id if last_inbound else None,
+            direction=MessageDirection.OUTBOUND.value,
+            sender_email=config.from_email,
+            body=ticket.approved_response,
+            received_at=ticket.sent_at
+        ))
         db.commit()
+        page_cache.invalidate_ticket(ticket.ticket_id)
+        events.ticket_status_changed(ticket, TicketStatus.APPROVED.value)
     
     return result
 
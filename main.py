@@ -1,35 +1,41 @@
 import os
+import json
+import asyncio
 from contextlib import asynccontextmanager
 from datetime import datetime
 from fastapi import FastAPI, Depends, HTTPException, Request, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, Response, StreamingResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from database import engine, get_db, Base, SessionLocal
-from models import Ticket, EmailConfig, TicketStatus, SchedulerConfig
+from database import get_db, get_read_db, get_pool_stats
+from models import Ticket, EmailConfig, TicketStatus, SchedulerConfig, TicketAttachment, TicketMessage
 from email_ingestor import fetch_and_process_emails, create_test_ticket
 from mail_sender import send_approved_ticket_async, send_all_approved_tickets_async
-from ai_processor import analyze_email
-from scheduler import start_scheduler, stop_scheduler, update_scheduler_job, scheduler
-
-Base.metadata.create_all(bind=engine)
-
+from ai_processor import analyze_email, get_routing_stats
+from scheduler import start_scheduler_deferred, stop_scheduler, update_scheduler_job, remove_scheduler_job, get_poll_history, ADAPTIVE_POLLING
+import page_cache
+import events
+import attachment_store
+import similarity
+import archive
+import profiling
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    db = SessionLocal()
-    try:
-        start_scheduler(db)
-    finally:
-        db.close()
+    scheduler_startup = asyncio.create_task(start_scheduler_deferred())
+    events.start_listener()
     yield
+    scheduler_startup.cancel()
+    events.stop_listener()
     stop_scheduler()
 
 
 app = FastAPI(title="InfinityWork Support Desk", lifespan=lifespan)
+if profiling.PROFILING_ENABLED:
+    app.add_middleware(profiling.ProfilingMiddleware)
 
 os.makedirs("static", exist_ok=True)
 os.makedirs("templates", exist_ok=True)
@@ -38,35 +44,82 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
 
+def cached_page(request: Request, key: str, render) -> Response:
+    """Serve a rendered page from the page cache, answering 304 when the ETag matches."""
+    body, etag = page_cache.get_or_render(key, render)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if page_cache.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(content=body, headers=headers)
+
+
+# Cached pages render from the primary: a lagging replica read would be cached
+# (with a fresh ETag) for the whole TTL right after an invalidation.
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request, db: Session = Depends(get_db)):
-    tickets = db.query(Ticket).order_by(Ticket.created_at.desc()).all()
-    
-    stats = {
-        "total": len(tickets),
-        "pending": len([t for t in tickets if t.status == TicketStatus.PENDING_APPROVAL.value]),
-        "approved": len([t for t in tickets if t.status == TicketStatus.APPROVED.value]),
-        "sent": len([t for t in tickets if t.status == TicketStatus.SENT.value]),
-        "rejected": len([t for t in tickets if t.status == TicketStatus.REJECTED.value]),
-    }
+    def render():
+        tickets = db.query(Ticket).order_by(Ticket.created_at.desc()).all()
+        
+        stats = {
+            "total": len(tickets),
+            "pending": len([t for t in tickets if t.status == TicketStatus.PENDING_APPROVAL.value]),
+            "approved": len([t for t in tickets if t.status == TicketStatus.APPROVED.value]),
+            "sent": len([t for t in tickets if t.status == TicketStatus.SENT.value]),
+            "rejected": len([t for t in tickets if t.status == TicketStatus.REJECTED.value]),
+        }
+        
+        return templates.get_template("dashboard.html").render({
+            "request": request,
+            "tickets": tickets,
+            "stats": stats
+        })
     
-    return templates.TemplateResponse("dashboard.html", {
-        "request": request,
-        "tickets": tickets,
-        "stats": stats
-    })
+    return cached_page(request, page_cache.DASHBOARD_KEY, render)
 
 
 @app.get("/ticket/{ticket_id}", response_class=HTMLResponse)
 async def view_ticket(request: Request, ticket_id: str, db: Session = Depends(get_db)):
-    ticket = db.query(Ticket).filter(Ticket.ticket_id == ticket_id).first()
-    if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
+    def render():
+        ticket = archive.find_ticket(db, ticket_id)
+        if not ticket:
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        
+        attachments = db.query(TicketAttachment).filter(
+            TicketAttachment.ticket_id == ticket_id
+        ).order_by(TicketAttachment.id).all()
+        thread_messages = db.query(TicketMessage).filter(
+            TicketMessage.ticket_id == ticket_id,
+            TicketMessage.body.isnot(None)
+        ).order_by(TicketMessage.id).all()
+        similar_tickets = similarity.find_similar_tickets(
+            db, ticket.email_subject, ticket.email_body, k=5, exclude_ticket_id=ticket_id
+        )
+        
+        return templates.get_template("ticket_detail.html").render({
+            "request": request,
+            "ticket": ticket,
+            "attachments": attachments,
+            "thread_messages": thread_messages,
+            "similar_tickets": similar_tickets
+        })
     
-    return templates.TemplateResponse("ticket_detail.html", {
-        "request": request,
-        "ticket": ticket
-    })
+    return cached_page(request, page_cache.ticket_key(ticket_id), render)
+
+
+@app.get("/ticket/{ticket_id}/attachments/{attachment_id}")
+async def download_attachment(ticket_id: str, attachment_id: int, db: Session = Depends(get_db)):
+    attachment = db.query(TicketAttachment).filter(
+        TicketAttachment.id == attachment_id,
+        TicketAttachment.ticket_id == ticket_id
+    ).first()
+    if not attachment:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    
+    path = attachment_store.blob_path(attachment.sha256)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Attachment content not found")
+    
+    return FileResponse(path, media_type=attachment.content_type, filename=attachment.filename)
 
 
 @app.post("/ticket/{ticket_id}/approve")
@@ -80,11 +133,15 @@ async def approve_ticket(
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     
+    old_status = ticket.status
     ticket.status = TicketStatus.APPROVED.value
     ticket.approved_response = response_text
     ticket.approved_by = approved_by
     ticket.approved_at = datetime.utcnow()
     db.commit()
+    similarity.record_resolved(ticket)
+    page_cache.invalidate_ticket(ticket_id)
+    events.ticket_status_changed(ticket, old_status)
     
     return RedirectResponse(url=f"/ticket/{ticket_id}", status_code=303)
 
@@ -99,9 +156,12 @@ async def reject_ticket(
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     
+    old_status = ticket.status
     ticket.status = TicketStatus.REJECTED.value
     ticket.rejected_reason = rejection_reason
     db.commit()
+    page_cache.invalidate_ticket(ticket_id)
+    events.ticket_status_changed(ticket, old_status)
     
     return RedirectResponse(url=f"/ticket/{ticket_id}", status_code=303)
 
@@ -139,7 +199,9 @@ async def settings_page(request: Request, db: Session = Depends(get_db)):
     return templates.TemplateResponse("settings.html", {
         "request": request,
         "config": config,
-        "scheduler_config": scheduler_config
+        "scheduler_config": scheduler_config,
+        "adaptive_polling": ADAPTIVE_POLLING,
+        "poll_history": get_poll_history(db)
     })
 
 
@@ -212,9 +274,7 @@ async def save_scheduler_settings(
     if auto_fetch_enabled:
         update_scheduler_job(fetch_interval_minutes)
     else:
-        job = scheduler.get_job("auto_fetch_emails")
-        if job:
-            scheduler.remove_job("auto_fetch_emails")
+        remove_scheduler_job()
     
     return RedirectResponse(url="/settings", status_code=303)
 
@@ -245,10 +305,52 @@ async def create_test_ticket_endpoint(
     return RedirectResponse(url=f"/ticket/{ticket.ticket_id}", status_code=303)
 
 
+@app.get("/events")
+async def ticket_events(request: Request):
+    """Server-Sent Events stream of ticket-created and status-changed events."""
+    async def stream():
+        queue = events.subscribe()
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+        finally:
+            events.unsubscribe(queue)
+    
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+
+@app.get("/admin/profiles", response_class=HTMLResponse)
+async def profiles_page(request: Request):
+    return templates.TemplateResponse("profiles.html", {
+        "request": request,
+        "profiling_enabled": profiling.PROFILING_ENABLED,
+        "slow_request_ms": profiling.PROFILE_SLOW_REQUEST_MS,
+        "slow_job_ms": profiling.PROFILE_SLOW_JOB_MS,
+        "profiles": profiling.get_slowest()
+    })
+
+
+@app.get("/admin/profiles/{filename}")
+async def download_profile(filename: str):
+    path = profiling.profile_path(filename)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=filename)
+
+
 @app.get("/api/tickets")
 async def get_tickets(
     status: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     query = db.query(Ticket)
     if status:
@@ -257,12 +359,24 @@ async def get_tickets(
     return [t.to_dict() for t in tickets]
 
 
+@app.get("/api/ai/stats")
+async def get_ai_stats():
+    return get_routing_stats()
+
+
+@app.get("/api/db/stats")
+async def get_db_stats():
+    return get_pool_stats()
+
+
 @app.get("/api/ticket/{ticket_id}")
-async def get_ticket(ticket_id: str, db: Session = Depends(get_db)):
-    ticket = db.query(Ticket).filter(Ticket.ticket_id == ticket_id).first()
+async def get_ticket(ticket_id: str, db: Session = Depends(get_read_db)):
+    ticket = archive.find_ticket(db, ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
-    return ticket.to_dict()
+    result = ticket.to_dict()
+    result["archived"] = getattr(ticket, "archived", False)
+    return result
 
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum, LargeBinary, Float, Index
 from sqlalchemy.sql import func
 from database import Base
 import enum
@@ -24,6 +24,10 @@ class TicketUrgency(str, enum.Enum):
     MEDIUM = "Medium"
     HIGH = "High"
 
+class MessageDirection(str, enum.Enum):
+    INBOUND = "inbound"
+    OUTBOUND = "outbound"
+
 class Ticket(Base):
     __tablename__ = "tickets"
 
@@ -111,3 +115,108 @@ class SchedulerConfig(Base):
     last_fetch_count = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class FetchPollLog(Base):
+    """One auto-fetch run and the delay chosen before the next one."""
+    __tablename__ = "fetch_poll_log"
+
+    id = Column(Integer, primary_key=True, index=True)
+    fetched_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    fetch_count = Column(Integer, default=0)
+    capped = Column(Boolean, default=False)
+    arrival_rate = Column(Float, default=0.0)
+    interval_seconds = Column(Integer, nullable=False)
+    mode = Column(String(20), nullable=False)
+
+
+class TicketAttachment(Base):
+    __tablename__ = "ticket_attachments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    ticket_id = Column(String(50), index=True, nullable=False)
+    filename = Column(String(255), nullable=False)
+    content_type = Column(String(255), nullable=False)
+    size = Column(Integer, nullable=False)
+    sha256 = Column(String(64), index=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "ticket_id": self.ticket_id,
+            "filename": self.filename,
+            "content_type": self.content_type,
+            "size": self.size,
+            "sha256": self.sha256,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+class TicketMessage(Base):
+    """One email in a ticket's thread, indexed by Message-ID for reply matching.
+
+    The opening message's body lives on the ticket itself, so `body` is only
+    filled for follow-ups and outbound replies.
+    """
+    __tablename__ = "ticket_messages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    ticket_id = Column(String(50), index=True, nullable=False)
+    message_id = Column(String(512), index=True, nullable=True)
+    in_reply_to = Column(String(512), nullable=True)
+    direction = Column(String(20), default=MessageDirection.INBOUND.value, nullable=False)
+    sender_email = Column(String(255), nullable=True)
+    body = Column(Text, nullable=True)
+    received_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Flood checks match senders case-insensitively.
+    __table_args__ = (
+        Index("ix_ticket_messages_sender_email_lower", func.lower(sender_email)),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "ticket_id": self.ticket_id,
+            "message_id": self.message_id,
+            "in_reply_to": self.in_reply_to,
+            "direction": self.direction,
+            "sender_email": self.sender_email,
+            "body": self.body,
+            "received_at": self.received_at.isoformat() if self.received_at else None,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+class ArchivedTicket(Base):
+    """Cold storage for old sent/rejected tickets.
+
+    Scalar columns stay queryable; the large text fields are kept together
+    as one zstd-compressed JSON payload.
+    """
+    __tablename__ = "archived_tickets"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    ticket_id = Column(String(50), unique=True, index=True, nullable=False)
+
+    sender_email = Column(String(255), nullable=False)
+    sender_name = Column(String(255), nullable=True)
+    email_subject = Column(String(500), nullable=False)
+    received_at = Column(DateTime(timezone=True), nullable=False)
+
+    status = Column(String(50), nullable=False)
+    category = Column(String(50), nullable=True)
+    urgency = Column(String(20), nullable=True)
+    confidence = Column(String(20), nullable=True)
+    escalation_required = Column(Boolean, default=False)
+
+    approved_by = Column(String(255), nullable=True)
+    approved_at = Column(DateTime(timezone=True), nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+
+    payload = Column(LargeBinary, nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -0,0 +1,121 @@
+import hashlib
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+PAGE_CACHE_TTL_SECONDS = float(os.environ.get("PAGE_CACHE_TTL_SECONDS", "30"))
+PAGE_CACHE_MAX_ENTRIES = int(os.environ.get("PAGE_CACHE_MAX_ENTRIES", "512"))
+
+DASHBOARD_KEY = "dashboard"
+
+
+class CacheBackend(ABC):
+    """Storage interface for cached pages. Values are (body, etag) tuples."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Tuple[bytes, str], ttl: float):
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+
+class LRUCache(CacheBackend):
+    """In-process LRU cache with per-entry TTL."""
+
+    def __init__(self, max_entries: int = PAGE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Tuple[bytes, str], ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_backend: CacheBackend = LRUCache()
+
+
+def set_backend(backend: CacheBackend):
+    """Replace the cache backend, e.g. with one shared between workers."""
+    global _backend
+    _backend = backend
+
+
+def get_backend() -> CacheBackend:
+    return _backend
+
+
+def ticket_key(ticket_id: str) -> str:
+    return f"ticket:{ticket_id}"
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag."""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def get_or_render(key: str, render: Callable[[], str], ttl: float = PAGE_CACHE_TTL_SECONDS) -> Tuple[bytes, str]:
+    """Return the cached (body, etag) for key, rendering and storing it on a miss."""
+    if ttl > 0:
+        cached = _backend.get(key)
+        if cached is not None:
+            return cached
+
+    body = render().encode("utf-8")
+    value = (body, make_etag(body))
+    if ttl > 0:
+        _backend.set(key, value, ttl)
+    return value
+
+
+def invalidate_dashboard():
+    _backend.delete(DASHBOARD_KEY)
+
+
+def invalidate_ticket(ticket_id: str):
+    """Drop a ticket's page and the dashboard that lists it."""
+    _backend.delete(ticket_key(ticket_id))
+    invalidate_dashboard()
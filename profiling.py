@@ -0,0 +1,257 @@
+import contextvars
+import functools
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Off unless PROFILING_ENABLED is set. When on, every request and scheduler job is
+# sampled; profiles are written to PROFILE_DIR only for slow runs or when asked
+# for with `X-Profile: 1` / `?profile=1`.
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "").lower() in ("1", "true", "yes")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_INTERVAL_MS = float(os.environ.get("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_SLOW_REQUEST_MS = float(os.environ.get("PROFILE_SLOW_REQUEST_MS", "1000"))
+PROFILE_SLOW_JOB_MS = float(os.environ.get("PROFILE_SLOW_JOB_MS", "10000"))
+PROFILE_HISTORY = int(os.environ.get("PROFILE_HISTORY", "200"))
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", str(PROFILE_HISTORY)))
+PROFILE_EXCLUDE_PATHS = ("/events", "/static/", "/admin/profiles")
+TOP_QUERIES = 5
+MAX_STACK_DEPTH = 128
+
+_current = contextvars.ContextVar("current_profile", default=None)
+
+
+class Profile:
+    """Timing, SQL counters and sampled stacks for one request or job run."""
+
+    def __init__(self, kind: str, name: str, forced: bool = False):
+        self.kind = kind
+        self.name = name
+        self.forced = forced
+        self.thread_id = threading.get_ident()
+        self.started_at = datetime.utcnow()
+        self.started = time.perf_counter()
+        self.duration_ms = 0.0
+        self.status_code = None
+        self.query_count = 0
+        self.query_ms = 0.0
+        self.queries = Counter()
+        self.query_time = Counter()
+        self.stacks = Counter()
+
+    def record_query(self, statement: str, elapsed_ms: float):
+        statement = " ".join(statement.split())[:200]
+        self.query_count += 1
+        self.query_ms += elapsed_ms
+        self.queries[statement] += 1
+        self.query_time[statement] += elapsed_ms
+
+    def summary(self, profile_file: Optional[str]) -> dict:
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 1),
+            "status_code": self.status_code,
+            "query_count": self.query_count,
+            "query_ms": round(self.query_ms, 1),
+            "top_queries": [
+                {"statement": statement, "count": self.queries[statement], "total_ms": round(total_ms, 1)}
+                for statement, total_ms in self.query_time.most_common(TOP_QUERIES)
+            ],
+            "samples": sum(self.stacks.values()),
+            "profile_file": profile_file,
+            "forced": self.forced,
+        }
+
+
+class StackSampler:
+    """One background thread sampling the stacks of threads with an active profile.
+
+    Requests and jobs share the event loop thread, so samples taken while
+    several are in flight land in each of their profiles.
+    """
+
+    def __init__(self, interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self._profiles = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, profile: Profile):
+        with self._lock:
+            self._profiles.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+
+    def stop(self, profile: Profile):
+        with self._lock:
+            self._profiles.discard(profile)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._profiles:
+                    self._thread = None
+                    return
+                profiles = list(self._profiles)
+            frames = sys._current_frames()
+            folded = {}
+            for profile in profiles:
+                if profile.thread_id == own_id:
+                    continue
+                if profile.thread_id not in folded:
+                    frame = frames.get(profile.thread_id)
+                    folded[profile.thread_id] = fold_stack(frame) if frame is not None else None
+                if folded[profile.thread_id]:
+                    profile.stacks[folded[profile.thread_id]] += 1
+            del frames
+            time.sleep(self.interval)
+
+
+def fold_stack(frame) -> str:
+    """Render a frame's stack root-first as `file:function;...`, the folded flame-graph format."""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+sampler = StackSampler()
+_history_lock = threading.Lock()
+_history = deque(maxlen=PROFILE_HISTORY)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    starts = conn.info.get("profile_query_start")
+    if profile is not None and starts:
+        profile.record_query(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+
+def _profile_filename(profile: Profile) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", profile.name).strip("-")[:60] or "root"
+    return f"{profile.started_at:%Y%m%d-%H%M%S-%f}-{profile.kind}-{slug}.folded"
+
+
+def write_profile(profile: Profile) -> Optional[str]:
+    """Write the sampled stacks as folded lines (`stack count`) for flamegraph.pl or speedscope."""
+    if not profile.stacks:
+        return None
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    filename = _profile_filename(profile)
+    with open(os.path.join(PROFILE_DIR, filename), "w") as f:
+        for stack, count in profile.stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    prune_profiles()
+    return filename
+
+
+def prune_profiles(max_files: int = PROFILE_MAX_FILES):
+    """Delete the oldest profiles beyond max_files; names sort by start time."""
+    filenames = sorted(name for name in os.listdir(PROFILE_DIR) if name.endswith(".folded"))
+    for filename in filenames[:max(0, len(filenames) - max_files)]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, filename))
+        except FileNotFoundError:
+            pass
+
+
+@contextmanager
+def profile(kind: str, name: str, forced: bool = False, slow_ms: float = PROFILE_SLOW_REQUEST_MS):
+    """Profile the enclosed block; keep it if it was forced or slower than slow_ms."""
+    current = Profile(kind, name, forced)
+    token = _current.set(current)
+    sampler.start(current)
+    try:
+        yield current
+    finally:
+        sampler.stop(current)
+        _current.reset(token)
+        current.duration_ms = (time.perf_counter() - current.started) * 1000
+        if forced or current.duration_ms >= slow_ms:
+            try:
+                profile_file = write_profile(current)
+            except OSError as e:
+                logger.error(f"Could not write profile for {name}: {str(e)}")
+                profile_file = None
+            with _history_lock:
+                _history.append(current.summary(profile_file))
+
+
+def get_slowest(limit: int = 50) -> list:
+    """Kept profiles from this process, slowest first; files pruned since are dropped from the records."""
+    with _history_lock:
+        records = list(_history)
+    records = sorted(records, key=lambda record: -record["duration_ms"])[:limit]
+    return [
+        dict(record, profile_file=None)
+        if record["profile_file"] and not os.path.exists(os.path.join(PROFILE_DIR, record["profile_file"]))
+        else record
+        for record in records
+    ]
+
+
+def profile_path(filename: str) -> Optional[str]:
+    """Path of a written profile, or None for unknown or unsafe names."""
+    if os.path.basename(filename) != filename or not filename.endswith(".folded"):
+        return None
+    path = os.path.join(PROFILE_DIR, filename)
+    return path if os.path.exists(path) else None
+
+
+def profile_job(func):
+    """Wrap an async scheduler job so slow runs are profiled like requests."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not PROFILING_ENABLED:
+            return await func(*args, **kwargs)
+        with profile("job", func.__name__, slow_ms=PROFILE_SLOW_JOB_MS):
+            return await func(*args, **kwargs)
+    return wrapper
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling each HTTP request from first byte in to last byte out."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(PROFILE_EXCLUDE_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        forced = headers.get(b"x-profile") == b"1" or b"profile=1" in scope.get("query_string", b"").split(b"&")
+
+        with profile("request", f"{scope['method']} {scope['path']}", forced=forced) as current:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    current.status_code = message["status"]
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
@@ -1,31 +1,111 @@
+import asyncio
 import logging
-from datetime import datetime
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.interval import IntervalTrigger
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 from sqlalchemy.orm import Session
 
-from database import SessionLocal
-from models import EmailConfig, SchedulerConfig
+from database import BackgroundSessionLocal
+from models import EmailConfig, SchedulerConfig, FetchPollLog
 from email_ingestor import fetch_and_process_emails
+import archive
+import similarity
+import profiling
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-scheduler = AsyncIOScheduler()
+# Adaptive polling: instead of a fixed interval, each run picks the delay to the
+# next one from an exponentially smoothed arrival rate, aiming for roughly
+# ADAPTIVE_TARGET_BATCH messages per poll.
+ADAPTIVE_POLLING = os.environ.get("ADAPTIVE_POLLING", "").lower() in ("1", "true", "yes")
+ADAPTIVE_MIN_SECONDS = int(os.environ.get("ADAPTIVE_MIN_SECONDS", "30"))
+ADAPTIVE_MAX_SECONDS = int(os.environ.get("ADAPTIVE_MAX_SECONDS", "1800"))
+ADAPTIVE_SMOOTHING = float(os.environ.get("ADAPTIVE_SMOOTHING", "0.3"))
+ADAPTIVE_TARGET_BATCH = float(os.environ.get("ADAPTIVE_TARGET_BATCH", "5"))
+FETCH_BATCH_CAP = int(os.environ.get("FETCH_BATCH_CAP", "50"))
+IMMEDIATE_REPOLL_SECONDS = 1
+# Poll log rows older than this are deleted; the rate only needs the latest one.
+POLL_LOG_RETENTION_DAYS = int(os.environ.get("POLL_LOG_RETENTION_DAYS", "7"))
 
+JOB_ID = "auto_fetch_emails"
+
+# Delay before the scheduler (and APScheduler's import) starts, so it stays off the
+# path to a worker's first request.
+SCHEDULER_START_DELAY_SECONDS = float(os.environ.get("SCHEDULER_START_DELAY_SECONDS", "1"))
+
+_scheduler = None
+
+
+def get_scheduler():
+    """The process-wide scheduler, created (and APScheduler imported) on first use."""
+    global _scheduler
+    if _scheduler is None:
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+        _scheduler = AsyncIOScheduler()
+    return _scheduler
+
+
+def _as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def next_poll_delay(previous_rate: Optional[float], fetch_count: int, elapsed_seconds: float, capped: bool) -> tuple:
+    """Return (delay_seconds, smoothed_rate) for the next adaptive poll.
+
+    Rates are messages per second. A capped batch means mail is still waiting,
+    so the next poll runs immediately.
+    """
+    observed_rate = fetch_count / max(elapsed_seconds, 1.0)
+    if previous_rate is None:
+        rate = observed_rate
+    else:
+        rate = ADAPTIVE_SMOOTHING * observed_rate + (1 - ADAPTIVE_SMOOTHING) * previous_rate
+    
+    if capped:
+        return IMMEDIATE_REPOLL_SECONDS, rate
+    if rate <= 0:
+        return ADAPTIVE_MAX_SECONDS, rate
+    delay = ADAPTIVE_TARGET_BATCH / rate
+    return int(min(ADAPTIVE_MAX_SECONDS, max(ADAPTIVE_MIN_SECONDS, delay))), rate
+
+
+def schedule_next_poll(delay_seconds: int):
+    """Queue the next adaptive run as a one-off job.
+
+    Each run schedules the next, so a run must never be dropped as misfired
+    when the event loop was blocked past its start time; it runs late instead.
+    """
+    from apscheduler.triggers.date import DateTrigger
+    
+    get_scheduler().add_job(
+        auto_fetch_emails_job,
+        trigger=DateTrigger(run_date=datetime.now() + timedelta(seconds=delay_seconds)),
+        id=JOB_ID,
+        name="Auto Fetch Emails",
+        replace_existing=True,
+        misfire_grace_time=None,
+        coalesce=True
+    )
+
+
+@profiling.profile_job
 async def auto_fetch_emails_job():
     """Background job to automatically fetch emails."""
     logger.info(f"[{datetime.now()}] Auto-fetch job started...")
     
-    db = SessionLocal()
+    enabled = False
+    next_delay = ADAPTIVE_MAX_SECONDS
+    db = BackgroundSessionLocal()
     try:
-        scheduler_config = db.query(SchedulerConfig).filter(
-            SchedulerConfig.is_active == True
-        ).first()
+        scheduler_config = db.query(SchedulerConfig).first()
         
         if not scheduler_config or not scheduler_config.auto_fetch_enabled:
             logger.info("Auto-fetch is disabled, skipping...")
             return
+        enabled = True
         
         email_config = db.query(EmailConfig).filter(
             EmailConfig.is_active == True
@@ -35,13 +115,54 @@ async def auto_fetch_emails_job():
             logger.warning("No email configuration found, skipping auto-fetch...")
             return
         
-        result = fetch_and_process_emails(db, email_config)
+        result = fetch_and_process_emails(
+            db, email_config, max_messages=FETCH_BATCH_CAP if ADAPTIVE_POLLING else None
+        )
         
+        previous_fetch_at = _as_naive_utc(scheduler_config.last_fetch_at)
         scheduler_config.last_fetch_at = datetime.utcnow()
         scheduler_config.last_fetch_count = result.get("processed", 0)
+        
+        if ADAPTIVE_POLLING:
+            last_poll = db.query(FetchPollLog).filter(
+                FetchPollLog.mode == "adaptive"
+            ).order_by(FetchPollLog.id.desc()).first()
+            # Without a previous fetch the backlog age is unknown; assume the longest interval.
+            elapsed = (
+                (scheduler_config.last_fetch_at - previous_fetch_at).total_seconds()
+                if previous_fetch_at else ADAPTIVE_MAX_SECONDS
+            )
+            # Re-poll at once only if the capped batch made progress; a batch that
+            # only failed would otherwise spin on the same messages every second.
+            made_progress = result.get("processed", 0) > 0 or bool(result.get("suppressed"))
+            next_delay, rate = next_poll_delay(
+                last_poll.arrival_rate if last_poll else None,
+                scheduler_config.last_fetch_count,
+                elapsed,
+                result.get("capped", False) and made_progress
+            )
+            mode = "adaptive"
+        else:
+            next_delay = scheduler_config.fetch_interval_minutes * 60
+            rate = 0.0
+            mode = "fixed"
+        
+        db.add(FetchPollLog(
+            fetched_at=scheduler_config.last_fetch_at,
+            fetch_count=scheduler_config.last_fetch_count,
+            capped=result.get("capped", False),
+            arrival_rate=rate,
+            interval_seconds=next_delay,
+            mode=mode
+        ))
+        db.query(FetchPollLog).filter(
+            FetchPollLog.fetched_at < scheduler_config.last_fetch_at - timedelta(days=POLL_LOG_RETENTION_DAYS)
+        ).delete(synchronize_session=False)
         db.commit()
         
         logger.info(f"Auto-fetch completed: {result['processed']} emails processed")
+        if ADAPTIVE_POLLING:
+            logger.info(f"Next adaptive poll in {next_delay}s ({rate * 60:.2f} msgs/min smoothed)")
         if result.get("errors"):
             for error in result["errors"]:
                 logger.error(f"Auto-fetch error: {error}")
@@ -50,6 +171,34 @@ async def auto_fetch_emails_job():
         logger.error(f"Auto-fetch job failed: {str(e)}")
     finally:
         db.close()
+        if ADAPTIVE_POLLING and enabled:
+            schedule_next_poll(next_delay)
+
+
+async def refresh_similarity_job():
+    """Background job that builds the similar-ticket index and adds new resolutions."""
+    try:
+        # The first run scans every resolved ticket, so keep it off the event loop.
+        added = await asyncio.to_thread(similarity.refresh_index)
+        if added:
+            logger.info(f"Similarity index refreshed: {added} tickets added")
+    except Exception as e:
+        logger.error(f"Similarity index refresh failed: {str(e)}")
+
+
+@profiling.profile_job
+async def archive_tickets_job():
+    """Background job that moves old sent/rejected tickets to the archive and purges expired ones."""
+    db = BackgroundSessionLocal()
+    try:
+        archived = archive.archive_tickets(db)
+        purged = archive.purge_archive(db)
+        logger.info(f"Archive job completed: {archived} tickets archived, {purged} purged")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Archive job failed: {str(e)}")
+    finally:
+        db.close()
 
 
 def get_scheduler_config(db: Session) -> dict:
@@ -72,21 +221,36 @@ def get_scheduler_config(db: Session) -> dict:
 
 def update_scheduler_job(interval_minutes: int):
     """Update the scheduler job interval."""
-    job_id = "auto_fetch_emails"
+    from apscheduler.triggers.interval import IntervalTrigger
+    
+    job_id = JOB_ID
+    scheduler = get_scheduler()
     
     if scheduler.get_job(job_id):
         scheduler.remove_job(job_id)
     
+    if ADAPTIVE_POLLING:
+        schedule_next_poll(ADAPTIVE_MIN_SECONDS)
+        logger.info(f"Scheduler updated: adaptive polling every {ADAPTIVE_MIN_SECONDS}-{ADAPTIVE_MAX_SECONDS} seconds")
+        return
+    
     scheduler.add_job(
         auto_fetch_emails_job,
         trigger=IntervalTrigger(minutes=interval_minutes),
         id=job_id,
         name="Auto Fetch Emails",
-        replace_existing=True
+        replace_existing=True,
+        misfire_grace_time=None,
+        coalesce=True
     )
     logger.info(f"Scheduler updated: fetching every {interval_minutes} minutes")
 
 
+def get_poll_history(db: Session, limit: int = 20) -> list:
+    """Most recent auto-fetch runs with the interval chosen after each."""
+    return db.query(FetchPollLog).order_by(FetchPollLog.id.desc()).limit(limit).all()
+
+
 def start_scheduler(db: Session):
     """Start the scheduler with current configuration."""
     config = db.query(SchedulerConfig).first()
@@ -105,12 +269,54 @@ def start_scheduler(db: Session):
     else:
         logger.info("Scheduler initialized but auto-fetch is disabled")
     
+    from apscheduler.triggers.interval import IntervalTrigger
+    
+    scheduler = get_scheduler()
+    # Built in the background at startup, then topped up with resolutions from every worker.
+    scheduler.add_job(
+        refresh_similarity_job,
+        trigger=IntervalTrigger(seconds=similarity.SIMILARITY_REFRESH_SECONDS),
+        next_run_time=datetime.now(),
+        id="refresh_similarity",
+        name="Refresh Similar-Ticket Index",
+        replace_existing=True
+    )
+    
+    if archive.ARCHIVE_AFTER_DAYS > 0:
+        scheduler.add_job(
+            archive_tickets_job,
+            trigger=IntervalTrigger(hours=24),
+            # First run shortly after boot, or workers restarted more often than daily never archive.
+            next_run_time=datetime.now() + timedelta(minutes=1),
+            id="archive_tickets",
+            name="Archive Old Tickets",
+            replace_existing=True
+        )
+    
     if not scheduler.running:
         scheduler.start()
 
 
+async def start_scheduler_deferred(delay_seconds: float = SCHEDULER_START_DELAY_SECONDS):
+    """Start the scheduler once the worker is already serving requests."""
+    await asyncio.sleep(delay_seconds)
+    db = BackgroundSessionLocal()
+    try:
+        start_scheduler(db)
+    except Exception as e:
+        logger.error(f"Scheduler failed to start: {str(e)}")
+    finally:
+        db.close()
+
+
+def remove_scheduler_job():
+    """Stop auto-fetching by removing its job, if one is scheduled."""
+    if _scheduler is not None and _scheduler.get_job(JOB_ID):
+        _scheduler.remove_job(JOB_ID)
+
+
 def stop_scheduler():
     """Stop the scheduler."""
-    if scheduler.running:
-        scheduler.shutdown()
+    if _scheduler is not None and _scheduler.running:
+        _scheduler.shutdown()
         logger.info("Scheduler stopped")
@@ -0,0 +1,200 @@
+import os
+import re
+import threading
+import zlib
+from typing import Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from database import BackgroundSessionLocal
+from models import Ticket, TicketStatus, ArchivedTicket
+import archive
+
+SIMILARITY_DIMENSIONS = int(os.environ.get("SIMILARITY_DIMENSIONS", "512"))
+SIMILAR_TICKETS_K = int(os.environ.get("SIMILAR_TICKETS_K", "3"))
+MIN_SIMILARITY = float(os.environ.get("MIN_SIMILARITY", "0.2"))
+SIMILARITY_REFRESH_SECONDS = int(os.environ.get("SIMILARITY_REFRESH_SECONDS", "60"))
+LOAD_BATCH_SIZE = 1000
+
+RESOLVED_STATUSES = (TicketStatus.APPROVED.value, TicketStatus.SENT.value)
+
+TOKEN_RE = re.compile(r"[a-z0-9]{2,}")
+STOPWORDS = {
+    "the", "and", "for", "you", "your", "our", "are", "was", "with", "this", "that", "have",
+    "has", "not", "but", "can", "from", "please", "thanks", "thank", "good", "day", "regards",
+    "hello", "dear", "would", "could", "will", "there", "they", "been", "any", "all", "its",
+}
+
+
+def embed(text: str, dimensions: int = SIMILARITY_DIMENSIONS) -> np.ndarray:
+    """Hashed bag-of-words vector (unigrams and bigrams), L2-normalized."""
+    tokens = [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for feature in features:
+        digest = zlib.crc32(feature.encode("utf-8"))
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        vector[digest % dimensions] += sign
+
+    vector = np.sign(vector) * np.log1p(np.abs(vector))
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+def ticket_text(subject: str, body: str) -> str:
+    return f"{subject or ''}\n{body or ''}"
+
+
+class SimilarityIndex:
+    """In-memory cosine-similarity index over resolved tickets.
+
+    It is built off the request path by `refresh`, which afterwards only reads
+    tickets approved since the last run (the `approved_at` high-water mark), so
+    every worker picks up resolutions made by the others.
+    """
+
+    def __init__(self, dimensions: int = SIMILARITY_DIMENSIONS):
+        self.dimensions = dimensions
+        self._matrix = np.zeros((0, dimensions), dtype=np.float32)
+        self._ticket_ids = []
+        self._positions = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.high_water = None
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._ticket_ids)
+
+    def add(self, ticket_id: str, text: str):
+        vector = embed(text, self.dimensions)
+        with self._lock:
+            position = self._positions.get(ticket_id)
+            if position is None:
+                position = len(self._ticket_ids)
+                if position == self._matrix.shape[0]:
+                    grown = np.zeros((max(64, position * 2), self.dimensions), dtype=np.float32)
+                    grown[:position] = self._matrix[:position]
+                    self._matrix = grown
+                self._ticket_ids.append(ticket_id)
+                self._positions[ticket_id] = position
+            self._matrix[position] = vector
+
+    def query(self, text: str, k: int, exclude: Optional[str] = None) -> list:
+        """Return up to k (ticket_id, score) pairs, most similar first."""
+        vector = embed(text, self.dimensions)
+        with self._lock:
+            count = len(self._ticket_ids)
+            if count == 0 or k <= 0:
+                return []
+            scores = self._matrix[:count] @ vector
+            ticket_ids = list(self._ticket_ids)
+
+        wanted = min(count, k + 1)
+        top = np.argpartition(-scores, wanted - 1)[:wanted]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (ticket_ids[i], float(scores[i]))
+            for i in top
+            if ticket_ids[i] != exclude and scores[i] >= MIN_SIMILARITY
+        ][:k]
+
+    def refresh(self, db: Session) -> int:
+        """Add resolved tickets approved since the last refresh; the first call builds the index."""
+        with self._refresh_lock:
+            query = db.query(Ticket.ticket_id, Ticket.email_subject, Ticket.email_body, Ticket.approved_at).filter(
+                Ticket.status.in_(RESOLVED_STATUSES),
+                Ticket.approved_response.isnot(None)
+            )
+            added = 0
+            if self.high_water is not None:
+                # >= rather than >: re-adding a ticket just replaces its row.
+                query = query.filter(Ticket.approved_at >= self.high_water)
+            if not self.loaded:
+                # Archived resolutions stay useful references; they never change, so load them once.
+                archived = db.query(ArchivedTicket).filter(
+                    ArchivedTicket.status.in_(RESOLVED_STATUSES)
+                ).yield_per(LOAD_BATCH_SIZE)
+                for row in archived:
+                    ticket = archive.restore_ticket(row)
+                    if ticket.approved_response:
+                        self.add(ticket.ticket_id, ticket_text(ticket.email_subject, ticket.email_body))
+                        added += 1
+            
+            for ticket_id, subject, body, approved_at in query.yield_per(LOAD_BATCH_SIZE):
+                self.add(ticket_id, ticket_text(subject, body))
+                if approved_at is not None and (self.high_water is None or approved_at > self.high_water):
+                    self.high_water = approved_at
+                added += 1
+            self.loaded = True
+            return added
+
+
+index = SimilarityIndex()
+
+
+def record_resolved(ticket: Ticket):
+    """Add a newly approved ticket to the index."""
+    if index.loaded and ticket.approved_response:
+        index.add(ticket.ticket_id, ticket_text(ticket.email_subject, ticket.email_body))
+
+
+def refresh_index() -> int:
+    """Refresh the global index in its own session; run from the background scheduler."""
+    db = BackgroundSessionLocal()
+    try:
+        return index.refresh(db)
+    finally:
+        db.close()
+
+
+def find_similar_tickets(
+    db: Session,
+    subject: str,
+    body: str,
+    k: int = SIMILAR_TICKETS_K,
+    exclude_ticket_id: Optional[str] = None
+) -> list:
+    """Resolved tickets most similar to the given email, with their approved responses.
+
+    Returns nothing until the background refresh has built the index.
+    """
+    if not index.loaded:
+        return []
+    # Over-fetch so rows for tickets that were purged since do not leave us short of k.
+    matches = index.query(ticket_text(subject, body), k * 2, exclude=exclude_ticket_id)
+    if not matches:
+        return []
+
+    ticket_ids = [ticket_id for ticket_id, _ in matches]
+    # Tickets reopened since they were indexed keep their old approved_response,
+    # so check the status rather than trusting the index.
+    tickets = {
+        ticket.ticket_id: ticket
+        for ticket in db.query(Ticket).filter(
+            Ticket.ticket_id.in_(ticket_ids),
+            Ticket.status.in_(RESOLVED_STATUSES)
+        )
+    }
+    archived_ids = [ticket_id for ticket_id in ticket_ids if ticket_id not in tickets]
+    if archived_ids:
+        for row in db.query(ArchivedTicket).filter(
+            ArchivedTicket.ticket_id.in_(archived_ids),
+            ArchivedTicket.status.in_(RESOLVED_STATUSES)
+        ):
+            tickets[row.ticket_id] = archive.restore_ticket(row)
+    return [
+        {
+            "ticket_id": ticket_id,
+            "email_subject": tickets[ticket_id].email_subject,
+            "summary": tickets[ticket_id].summary,
+            "approved_response": tickets[ticket_id].approved_response,
+            "score": round(score, 3),
+        }
+        for ticket_id, score in matches
+        if ticket_id in tickets and tickets[ticket_id].approved_response
+    ][:k]